@@ -0,0 +1,111 @@
+"""
+        Aggregati per (Date, Lab, Plot) aggiornati a ogni salvataggio
+"""
+
+import json
+from .stores import SummaryStore, merge_stats
+
+
+class AggregateStore(SummaryStore):
+    """
+         SCOPO DELLA CLASSE `AggregateStore`:
+         ===================================
+         Mantiene, per un file di record, conteggio, somma, minimo e massimo
+         dei campi numerici raggruppati per (Date, Lab, Plot), così i
+         riepiloghi giornalieri richiesti dai supervisori sono una semplice
+         lettura invece di una scansione dell'intero file.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Aggiornamento incrementale**: `add()` e `remove()` vengono
+             chiamati dal modello per ogni record salvato, corretto o
+             cancellato e aggiornano solo il gruppo del record.
+         2.  **Persistenza**: gli aggregati vengono salvati in
+             `<file>.aggregates.json` insieme alla firma del file di record
+             (vedi `SummaryStore`); se non corrisponde più vengono
+             ricalcolati dai record.
+    """
+
+    metrics = (
+        'Humidity', 'Light', 'Temperature', 'Plants', 'Blossoms', 'Fruit',
+        'Min Height', 'Max Height', 'Med Height'
+    )
+    group_fields = ('Date', 'Lab', 'Plot')
+    suffix = '.aggregates.json'
+
+    def _encode(self):
+        groups = dict()
+        for (*group, field), stats in self.table.items():
+            groups.setdefault('|'.join(group), dict())[field] = stats
+        return json.dumps(
+            {'signature': self.signature, 'groups': groups}
+        ).encode('utf-8')
+
+    def _decode(self, data, signature):
+        try:
+            content = json.loads(data)
+        except ValueError:
+            return None
+        if content.get('signature') == signature:
+            self.table = {
+                (*key.split('|'), field): stats
+                for key, group in content['groups'].items()
+                for field, stats in group.items()
+            }
+        return content.get('signature')
+
+    def _cells(self, record):
+        """Le voci di un record: (Date, Lab, Plot, campo) -> valore."""
+        group = tuple(
+            '' if record.get(field) is None else str(record.get(field))
+            for field in self.group_fields
+        )
+        for field in self.metrics:
+            value = self._number(record.get(field))
+            if value is not None:
+                yield (*group, field), value
+
+    def summary(self, date=None, lab=None, plot=None):
+        """
+    Riepiloga i gruppi che corrispondono ai filtri indicati.
+
+    Args:
+        date (str): data ISO (None = tutte).
+        lab, plot (str): laboratorio e plot (None = tutti).
+
+    Returns:
+        dict: per ogni campo numerico, `count`, `sum`, `min`, `max` e `mean`.
+    """
+        merged = dict()
+        for (g_date, g_lab, g_plot, field), stats in self.table.items():
+            if (
+                    (date is not None and g_date != date) or
+                    (lab is not None and g_lab != lab) or
+                    (plot is not None and g_plot != str(plot))
+            ):
+                continue
+            merge_stats(merged, field, stats)
+        return {
+            field: {
+                'count': count, 'sum': total, 'min': low, 'max': high,
+                'mean': total / count,
+            }
+            for field, (count, total, low, high) in merged.items()
+        }
+
+    @staticmethod
+    def combine(summaries):
+        """Unisce i riepiloghi di più file (es. più partizioni della stessa data)."""
+        combined = dict()
+        for summary in summaries:
+            for field, stats in summary.items():
+                current = combined.get(field)
+                if current is None:
+                    combined[field] = dict(stats)
+                    continue
+                current['count'] += stats['count']
+                current['sum'] += stats['sum']
+                current['min'] = min(current['min'], stats['min'])
+                current['max'] = max(current['max'], stats['max'])
+                current['mean'] = current['sum'] / current['count']
+        return combined
@@ -0,0 +1,128 @@
+"""
+        Integrazione di asyncio con il ciclo degli eventi di Tkinter
+"""
+
+import asyncio
+import functools
+
+
+class AsyncioBridge:
+    """
+         SCOPO DELLA CLASSE `AsyncioBridge`:
+         ==================================
+         Fa girare un ciclo di eventi asyncio *nel thread di Tk*, insieme a
+         `mainloop()`, così le callback di Tk possono avviare coroutine (I/O
+         di rete, salvataggi, sensori) senza creare un thread per ogni
+         funzionalità e senza bloccare l'interfaccia.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Avanzamento a passi**: ogni `after()` esegue un solo giro del
+             ciclo asyncio (`call_soon(loop.stop)` + `run_forever()`): le
+             callback pronte vengono eseguite e l'attesa dell'I/O ha timeout
+             zero, quindi il passo non blocca mai Tk.
+         2.  **Frequenza adattiva**: con coroutine in corso il passo viene
+             ripetuto ogni `busy_interval` ms, altrimenti ogni
+             `idle_interval` ms.
+         3.  **Stesso thread**: coroutine e callback di completamento girano
+             nel thread di Tk e possono aggiornare i widget direttamente.
+             Il lavoro bloccante (es. `CSVModel.save_records`) va passato a
+             `to_thread`, che lo esegue in un thread del pool di asyncio.
+
+         ESEMPIO DI UTILIZZO:
+         --------------------
+         async def _save_async(self, records):
+             count = await self.aio.to_thread(self.model.save_records, records)
+             self.status.set(f'{count} records saved')
+
+         self.aio.run(self._save_async(records), on_error=self._show_error)
+    """
+
+    busy_interval = 5
+    idle_interval = 50
+
+    def __init__(self, root):
+        self.root = root
+        self.loop = asyncio.new_event_loop()
+        self._job = None
+
+    def start(self):
+        """Avvia l'avanzamento periodico del ciclo asyncio."""
+        if self._job is None:
+            self._step()
+
+    def _step(self):
+        loop = self.loop
+        loop.call_soon(loop.stop)
+        loop.run_forever()
+        busy = any(not task.done() for task in asyncio.all_tasks(loop))
+        self._job = self.root.after(
+            self.busy_interval if busy else self.idle_interval, self._step
+        )
+
+    def stop(self):
+        """Annulla le coroutine in corso e chiude il ciclo asyncio."""
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        if self.loop.is_closed():
+            return
+        tasks = [task for task in asyncio.all_tasks(self.loop) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+        self.loop.run_until_complete(self.loop.shutdown_default_executor())
+        self.loop.close()
+
+    def run(self, coro, on_done=None, on_error=None):
+        """
+    Avvia una coroutine da una callback di Tk, senza aspettarla.
+
+    Args:
+        coro: la coroutine.
+        on_done: chiamata con il risultato (nel thread di Tk).
+        on_error: chiamata con l'eccezione; se manca, l'eccezione viene
+            passata a `report_callback_exception` come per le callback di Tk.
+
+    Returns:
+        asyncio.Task: il task, che si può annullare con `cancel()`.
+    """
+        task = self.loop.create_task(coro)
+
+        def done(task):
+            if task.cancelled():
+                return
+            error = task.exception()
+            if error is not None:
+                if on_error is not None:
+                    on_error(error)
+                else:
+                    self.root.report_callback_exception(
+                        type(error), error, error.__traceback__
+                    )
+            elif on_done is not None:
+                on_done(task.result())
+        task.add_done_callback(done)
+        return task
+
+    def callback(self, coroutine_function):
+        """
+    Trasforma una funzione `async def` in una callback per Tk (`command=`,
+    `bind`): ogni chiamata avvia una nuova coroutine con `run`.
+    """
+        @functools.wraps(coroutine_function)
+        def wrapper(*args, **kwargs):
+            return self.run(coroutine_function(*args, **kwargs))
+        return wrapper
+
+    def to_thread(self, func, *args, **kwargs):
+        """
+    Esegue una funzione bloccante (salvataggi, letture di file) in un thread
+    del pool e restituisce un awaitable con il suo risultato.
+    """
+        return self.loop.run_in_executor(
+            None, functools.partial(func, *args, **kwargs)
+        )
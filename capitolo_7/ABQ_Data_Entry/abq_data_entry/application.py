@@ -1,7 +1,17 @@
+import os
+import threading
 import tkinter as tk
 from tkinter import ttk
+from . import ingest
 from . import views as v
 from . import models as m
+from . import widgets as w
+from .aio import AsyncioBridge
+from .dispatch import UIDispatcher
+from .monitor import StallMonitor
+from .sensors import SensorReader, SimulatedDevice
+from .tracer import TclTracer
+from .validation import RecordValidator
 from tkinter import messagebox # import che serve per le finistre di dialogo
 from tkinter import filedialog # import che serve per le finistre di dialogo per i files
 
@@ -28,6 +38,21 @@ class Application(tk.Tk):
 
         super().__init__(*args, **kwargs)
 
+        # Monitor opzionale dei blocchi dell'interfaccia: si attiva impostando
+        # la variabile d'ambiente ABQ_STALL_LOG con il percorso del file di log.
+        # Va avviato prima di creare i widget, così tutte le loro callback
+        # (validazione, trace, bottoni) vengono cronometrate.
+        self.monitor = None
+        if os.environ.get('ABQ_STALL_LOG'):
+            self.monitor = StallMonitor(self, logfile=os.environ['ABQ_STALL_LOG'])
+            self.monitor.start()
+
+        # Contatore opzionale dei round-trip verso Tcl: si attiva impostando
+        # ABQ_TCL_TRACE con la cartella in cui scrivere il report di sessione.
+        self.tracer = None
+        if os.environ.get('ABQ_TCL_TRACE'):
+            self._start_tracer(os.environ['ABQ_TCL_TRACE'])
+
         # 08/02/2026 questo codice permette il caricamento della form di Login prima di tutto
         self.withdraw()
         if not self._show_login():
@@ -48,14 +73,29 @@ class Application(tk.Tk):
         ).grid(row=0)
 
         # 2. Crea l'istanza della Vista (il form), passandole un riferimento a se stessa
-        #    (il Controllore) e al Modello.
-        self.recordform = v.DataRecordForm(self, self.model)
-        self.recordform.grid(row=1, padx=10, sticky=(tk.W + tk.E))
+        #    (il Controllore) e al Modello. Il form e la lista dei record sono
+        #    due schede di un `ttk.Notebook`.
+        self.notebook = ttk.Notebook(self)
+        self.notebook.grid(row=1, padx=10, sticky=(tk.W + tk.E))
+        self.recordform = v.DataRecordForm(self.notebook, self.model)
+        self.notebook.add(self.recordform, text='Entry Form')
+        self.gridform = v.GridEntryForm(self.notebook, self.model)
+        self.notebook.add(self.gridform, text='Grid Entry')
+        self.recordlist = v.RecordList(self.notebook, self.model)
+        self.notebook.add(self.recordlist, text='Record List')
+        self.trendview = v.TrendView(self.notebook, self.model)
+        self.notebook.add(self.trendview, text='Trends')
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_change)
 
         # 3. Collega l'evento personalizzato `<<SaveRecord>>` (generato dalla Vista)
         #    al metodo `_on_save` di questo Controllore.
         #    Questo è un ottimo esempio di decoupling tra Vista e Controllore.
         self.recordform.bind('<<SaveRecord>>', self._on_save)
+        self.gridform.bind('<<SaveRecords>>', self._on_save_grid)
+        self.recordform.bind('<<PasteRecords>>', self._on_paste_records)
+        self.bind('<Control-V>', self._on_paste_records)
+        self.recordform.bind('<<FillFromSensors>>', self._on_fill_from_sensors)
+        self.trendview.bind('<<ShowTrends>>', self._on_show_trends)
 
         # 4. Crea la barra di stato per fornire feedback all'utente.
         self.status = tk.StringVar()
@@ -64,6 +104,118 @@ class Application(tk.Tk):
 
         self._records_saved = 0
 
+        # il cruscotto dei supervisori, in una finestra separata
+        self.dashboard = None
+        ttk.Button(
+            self, text='Supervisor Dashboard', command=self._show_dashboard
+        ).grid(row=2, padx=10, sticky=tk.E)
+
+        # Lettura opzionale dei sensori ambientali: si attiva impostando
+        # ABQ_SENSOR_SOURCE con `host:porta`, il percorso di un socket Unix o
+        # di una FIFO, oppure `simulated` per un dispositivo simulato.
+        self.sensors = None
+        if os.environ.get('ABQ_SENSOR_SOURCE'):
+            self._start_sensors(os.environ['ABQ_SENSOR_SOURCE'])
+
+        # ciclo asyncio cooperativo, avanzato a passi da `after()`: le callback
+        # possono avviare coroutine con `self.aio.run(...)`
+        self.aio = AsyncioBridge(self)
+        self.aio.start()
+        # coda con cui i thread di lavoro aggiornano l'interfaccia
+        self.dispatcher = UIDispatcher(self)
+        self.dispatcher.start()
+        self.bind('<Destroy>', self._on_destroy, add='+')
+
+        # compattazione periodica del registro delle modifiche, in background
+        self.after(self.compaction_interval, self._schedule_compaction)
+
+    # ogni quanti millisecondi controllare il registro delle modifiche
+    compaction_interval = 5 * 60 * 1000
+
+    def _schedule_compaction(self):
+        """
+        Compatta il registro delle modifiche del modello quando serve.
+
+        Il controllo (che legge il registro sotto il lock del modello) e la
+        riscrittura del file principale possono richiedere tempo, quindi
+        vengono eseguiti in un thread separato per non bloccare l'interfaccia.
+        """
+        threading.Thread(target=self._maintain_model, daemon=True).start()
+        self.after(self.compaction_interval, self._schedule_compaction)
+
+    def _maintain_model(self):
+        """Nel thread di lavoro: compatta il registro se serve, altrimenti salva gli indici."""
+        if self.model.needs_compaction():
+            self._compact()
+        else:
+            self.model.flush()
+
+    def _compact(self):
+        """Compatta il registro (nel thread di lavoro) e ne riporta l'esito."""
+        self.post_to_ui(self.status.set, 'Compacting change log...', key='status')
+        try:
+            self.model.compact()
+        except OSError as e:
+            self.post_to_ui(self.status.set, f'Compaction failed: {e}', key='status')
+        else:
+            self.post_to_ui(self.status.set, 'Change log compacted', key='status')
+
+    def post_to_ui(self, callback, *args, key=None):
+        """
+        Esegue `callback(*args)` nel thread di Tk; si può chiamare da
+        qualunque thread. Le chiamate con la stessa `key` ancora in attesa
+        vengono accorpate (vedi `UIDispatcher`).
+        """
+        self.dispatcher.post(callback, *args, key=key)
+
+    # letture più vecchie di questi secondi non compilano il form
+    sensor_max_age = 60
+
+    def _start_sensors(self, source):
+        """Avvia il thread che legge i sensori (ed eventualmente il simulatore)."""
+        if source == 'simulated':
+            device = SimulatedDevice(labs=self.model.fields['Lab']['values'])
+            device.start()
+            source = device.address
+        self.sensors = SensorReader(source)
+        self.sensors.start()
+
+    def _on_fill_from_sensors(self, *_):
+        """
+        Gestore dell'evento `<<FillFromSensors>>`: copia nel form le ultime
+        letture del Lab selezionato. Legge solo la cache dei sensori, quindi
+        non aspetta mai il flusso dei dati.
+        """
+        if self.sensors is None:
+            self.status.set('No sensor feed configured (set ABQ_SENSOR_SOURCE)')
+            return False
+        lab = self.recordform.get().get('Lab')
+        if not lab:
+            self.status.set('Select a Lab to fill from sensors')
+            return False
+        values = self.sensors.cache.latest(lab, max_age=self.sensor_max_age)
+        if not values:
+            self.status.set(f'No recent sensor readings for Lab {lab}')
+            return False
+        self.recordform.fill_environment(values)
+        self.status.set(f'Environment data filled from Lab {lab} sensors')
+
+    def _start_tracer(self, directory):
+        """Installa il `TclTracer` e pianifica il report alla chiusura."""
+        self.tracer = TclTracer()
+        self.tracer.install(self)
+        self.tracer.trace_method(Application, '_show_login')
+        self.tracer.trace_method(v.DataRecordForm, 'get_errors')
+        self.tracer.trace_method(v.DataRecordForm, 'reset')
+        self.tracer.trace_method(v.DataRecordForm, 'get')
+        self.tracer.trace_method(w.ValidatedSpinbox, '_key_validate')
+
+        def write_report(event):
+            if event.widget is self:
+                self.tracer.uninstall()
+                self.tracer.write_report(directory)
+        self.bind('<Destroy>', write_report, add='+')
+
     def _on_save(self, *_):
         """
         Gestore dell'evento `<<SaveRecord>>`, chiamato quando la Vista richiede un salvataggio.
@@ -76,12 +228,17 @@ class Application(tk.Tk):
             sono errori, blocca il salvataggio e notifica l'utente.
         2.  **Recupero Dati**: Se non ci sono errori, recupera i dati dalla Vista
             tramite `self.recordform.get()`.
-        3.  **Comando al Modello**: Comanda al Modello di salvare i dati tramite
-            `self.model.save_record(data)`. Il Controllore non sa *come*
-            vengono salvati i dati, delega semplicemente il compito.
-        4.  **Feedback e Reset**: Aggiorna la barra di stato con un messaggio di
-            successo e comanda alla Vista di resettarsi.
+        3.  **Comando al Modello**: Comanda al Modello di salvare i dati, in un
+            thread del pool di asyncio (vedi `_save_records`). Il Controllore
+            non sa *come* vengono salvati i dati, delega semplicemente il
+            compito.
+        4.  **Feedback e Reset**: A salvataggio concluso aggiorna la barra di
+            stato con un messaggio di successo e comanda alla Vista di
+            resettarsi.
         """
+        if self.recordform.savebutton.instate(['disabled']):
+            return False  # un salvataggio è già in corso
+
         # 1. Validazione pre-salvataggio
         errors = self.recordform.get_errors()
         if errors:
@@ -107,16 +264,167 @@ class Application(tk.Tk):
 
         # 2. e 3. Recupero dati e comando al Modello
         data = self.recordform.get()
-        self.model.save_record(data)
+        self.aio.run(self._save_records([data], self.recordform))
 
-        # 4. Feedback e Reset
-        self._records_saved += 1
+    async def _save_records(self, records, form=None):
+        """
+        Salva i record di un modulo (Entry Form o Grid Entry) o incollati in
+        un thread del pool di asyncio.
+
+        Il modello serializza le scritture con un lock: se un incolla in
+        blocco o la compattazione lo tengono, è il thread del pool ad
+        aspettare, non l'interfaccia. Il pulsante Save del modulo resta
+        disabilitato finché il salvataggio non termina.
+
+        L'esito viene mostrato tramite la coda (`post_to_ui`), fuori dal
+        passo del ciclo asyncio: una `messagebox` è modale e non può essere
+        aperta dentro una coroutine.
+        """
+        if form is not None:
+            form.savebutton.state(['disabled'])
+        try:
+            await self.aio.to_thread(self.model.save_records, records)
+        except (m.DuplicateRecordError, OSError) as e:
+            self.post_to_ui(self._on_save_failed, e)
+            return False
+        finally:
+            if form is not None:
+                form.savebutton.state(['!disabled'])
+        self.post_to_ui(self._on_records_saved, len(records), form)
+
+    def _on_records_saved(self, count, form=None):
+        # 4. Feedback e Reset (solo se il salvataggio è riuscito)
+        self._records_saved += count
         self.status.set(
             f"{self._records_saved} records saved this session"
         )
-        self.recordform.reset()
-    
-            
+        if form is not None:
+            form.reset()
+
+    def _on_save_failed(self, error):
+        """Riporta un salvataggio fallito; il modulo resta compilato."""
+        if isinstance(error, m.DuplicateRecordError):
+            self.status.set('Cannot save, duplicate records')
+            detail = (
+                'Records for these Date, Time, Lab and Plot '
+                f'have already been saved.\n{error}'
+            )
+        else:
+            self.status.set(f'Cannot save: {error}')
+            detail = str(error)
+        messagebox.showerror(
+            title='Error', message='Cannot save records', detail=detail
+        )
+
+    def _on_save_grid(self, *_):
+        """
+        Gestore dell'evento `<<SaveRecords>>` della griglia dei Plot.
+
+        Come `_on_save`, ma per tutte le righe compilate: vengono validate in
+        blocco e, solo se sono tutte valide, salvate con un'unica scrittura.
+        """
+        if self.gridform.savebutton.instate(['disabled']):
+            return False
+
+        records, errors = self.gridform.get_records()
+        if errors:
+            self.status.set(
+                "Cannot save, error in: {}".format(', '.join(errors.keys()))
+            )
+            messagebox.showerror(
+                title='Error',
+                message='Cannot save records',
+                detail='\n'.join(
+                    f'{where}: ' + '; '.join(
+                        f'{key} - {message}' for key, message in fields.items()
+                    )
+                    for where, fields in errors.items()
+                )
+            )
+            return False
+
+        self.aio.run(self._save_records(records, self.gridform))
+
+    def _on_paste_records(self, *_):
+        """
+        Incolla più record copiati da un foglio di calcolo (Ctrl+Shift+V).
+
+        Le righe separate da tabulazioni vengono lette e validate in blocco
+        contro `model.fields` (duplicati compresi, quindi anche l'archivio)
+        in un thread del pool, poi mostrate in anteprima; dopo la conferma
+        i record validi vengono salvati in un unico lotto.
+        """
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            text = ''
+        self.status.set('Checking pasted rows...')
+        self.aio.run(self._check_pasted(text))
+
+    async def _check_pasted(self, text):
+        columns = list(self.model.fields.keys())
+        checked = await self.aio.to_thread(
+            ingest.check_rows,
+            ingest.read_tsv_records(text, columns),
+            RecordValidator(self.model.fields), self.model
+        )
+        # l'anteprima è una finestra modale: va aperta fuori dalla coroutine
+        self.post_to_ui(self._preview_pasted, checked)
+
+    def _preview_pasted(self, checked):
+        """Mostra l'anteprima delle righe incollate e salva quelle confermate."""
+        if not checked:
+            self.status.set('Nothing to paste: copy some rows first')
+            return False
+
+        dialog = v.PastePreviewDialog(
+            self, 'Paste Records', checked, self.model.fields.keys()
+        )
+        if not dialog.result:
+            return False
+
+        records = [record for _, _, record, _ in checked if record]
+        self.status.set(f'Saving {len(records)} records...')
+        self.aio.run(self._save_records(records))
+
+    def _on_show_trends(self, *_):
+        """
+        Gestore dell'evento `<<ShowTrends>>`: i parametri vengono letti dai
+        controlli nel thread di Tk, i dati (record o riepiloghi, che possono
+        dover essere ricalcolati) in un thread del pool.
+        """
+        self.trendview.model = self.model
+        self.status.set('Loading trends...')
+        self.aio.run(self._load_trends(self.trendview.request()))
+
+    async def _load_trends(self, request):
+        series = await self.aio.to_thread(self.trendview.load, **request)
+        self.post_to_ui(self.trendview.show, series, request['field'])
+        self.post_to_ui(self.status.set, 'Trends updated', key='status')
+
+    def _show_dashboard(self):
+        """Apre il cruscotto dei supervisori (o lo porta in primo piano)."""
+        if self.dashboard is not None and self.dashboard.winfo_exists():
+            self.dashboard.lift()
+            return
+        self.dashboard = v.SupervisorDashboard(self, self.model)
+
+    def _on_destroy(self, event):
+        """Chiude il ciclo asyncio, la coda e i sensori alla chiusura della finestra."""
+        if event.widget is not self:
+            return
+        self.aio.stop()
+        self.dispatcher.stop()
+        self.model.flush()
+        if self.sensors is not None:
+            self.sensors.stop()
+
+    def _on_tab_change(self, *_):
+        """Aggiorna la lista dei record quando la sua scheda viene mostrata."""
+        if self.notebook.select() == str(self.recordlist):
+            self.recordlist.model = self.model
+            self.recordlist.refresh()
+
     def _on_file_select(self, *_):
         """ Handle the file->select action"""
         filename = filedialog.asksaveasfilename(
@@ -125,6 +433,7 @@ class Application(tk.Tk):
             filetypes=[('CSV', '*.csv', '*.CSV')],
         )
         if filename:
+            self.model.flush()
             self.model = m.CSVModel(filename=filename)
 
 
@@ -0,0 +1,157 @@
+"""
+        Caricamento degli archivi di record in array strutturati NumPy
+"""
+
+import math
+from pathlib import Path
+from .constants import FieldTypes as FT
+from .csvio import iter_canonical_rows
+
+# valore usato per i numeri interi mancanti (tutti i conteggi hanno min 0)
+MISSING_INT = -1
+# codice usato per i valori di categoria mancanti o sconosciuti
+MISSING_CODE = -1
+
+_TRUE_VALUES = frozenset(('true', '1', '1.0'))
+
+
+def _numpy():
+    """Importa NumPy solo quando serve: è una dipendenza opzionale."""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            'The array loader requires NumPy: install it with '
+            '"pip install numpy"'
+        ) from None
+    return numpy
+
+
+def _integer_dtype(spec):
+    """Il tipo intero più piccolo che contiene i valori ammessi (e MISSING_INT)."""
+    high = spec.get('max', 2 ** 31 - 1)
+    for dtype, limit in (('i1', 127), ('i2', 32767), ('i4', 2 ** 31 - 1)):
+        if high <= limit:
+            return dtype
+    return 'i8'
+
+
+def field_categories(fields):
+    """
+    I valori ammessi dei campi di categoria (es. Lab, Time, Plot).
+
+    Nell'array il valore è sostituito dalla sua posizione in questa lista;
+    `MISSING_CODE` indica un valore mancante o non previsto dallo schema.
+    """
+    return {
+        key: list(spec['values'])
+        for key, spec in fields.items()
+        if spec['type'] in (FT.string_list, FT.short_string_list) and 'values' in spec
+    }
+
+
+def record_dtype(fields):
+    """
+    Il dtype strutturato derivato da `CSVModel.fields`.
+
+    -   `decimal` -> float64 (NaN se mancante)
+    -   `integer` -> il più piccolo intero con segno sufficiente (`MISSING_INT`)
+    -   `boolean` -> bool
+    -   `iso_date_string` -> datetime64[D] (NaT se mancante)
+    -   campi con `values` -> codice di categoria int8 (vedi `field_categories`)
+    -   altri testi -> oggetti Python (str)
+    """
+    np = _numpy()
+    categories = field_categories(fields)
+    columns = []
+    for key, spec in fields.items():
+        field_type = spec['type']
+        if key in categories:
+            dtype = 'i1' if len(categories[key]) < 128 else 'i2'
+        elif field_type == FT.decimal:
+            dtype = 'f8'
+        elif field_type == FT.integer:
+            dtype = _integer_dtype(spec)
+        elif field_type == FT.boolean:
+            dtype = '?'
+        elif field_type == FT.iso_date_string:
+            dtype = 'datetime64[D]'
+        else:
+            dtype = object
+        columns.append((key, dtype))
+    return np.dtype(columns)
+
+
+def _converter(key, spec, categories):
+    """La funzione che converte la stringa del CSV nel valore della colonna."""
+    field_type = spec['type']
+    if key in categories:
+        codes = {value: code for code, value in enumerate(categories[key])}
+        return lambda value: codes.get(value, MISSING_CODE)
+    if field_type == FT.decimal:
+        return lambda value: float(value) if value else math.nan
+    if field_type == FT.integer:
+        return lambda value: int(float(value)) if value else MISSING_INT
+    if field_type == FT.boolean:
+        return lambda value: value.strip().lower() in _TRUE_VALUES
+    if field_type == FT.iso_date_string:
+        return lambda value: value or 'NaT'
+    return None
+
+
+def load_records(paths, fields=None, key_fields=None, chunk_rows=65536):
+    """
+    Carica uno o più file di record in un unico array strutturato NumPy.
+
+    Rispetto a una lista di dizionari occupa circa un decimo della memoria e
+    permette calcoli vettoriali (medie, filtri, raggruppamenti) sulle colonne.
+    I file vengono letti a blocchi di `chunk_rows` righe, convertiti colonna
+    per colonna e poi concatenati.
+
+    Args:
+        paths: un percorso o una sequenza di percorsi di file CSV.
+        fields (dict): lo schema (default: `CSVModel.fields`).
+        key_fields (tuple): i campi chiave per il registro delle modifiche
+            (default: `CSVModel.key_fields`).
+
+    Returns:
+        numpy.ndarray: l'array strutturato, con il dtype di `record_dtype`.
+
+    Raises:
+        ImportError: se NumPy non è installato.
+    """
+    np = _numpy()
+    if fields is None or key_fields is None:
+        from .models import CSVModel
+        fields = fields or CSVModel.fields
+        key_fields = key_fields or CSVModel.key_fields
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+
+    dtype = record_dtype(fields)
+    names = list(fields.keys())
+    categories = field_categories(fields)
+    converters = [_converter(key, fields[key], categories) for key in names]
+
+    def to_array(rows):
+        chunk = np.empty(len(rows), dtype=dtype)
+        for index, (name, convert) in enumerate(zip(names, converters)):
+            column = [row[index] for row in rows]
+            if convert is not None:
+                column = [convert(value) for value in column]
+            chunk[name] = column
+        return chunk
+
+    chunks = []
+    for path in paths:
+        rows = []
+        for row in iter_canonical_rows(path, names, tuple(key_fields)):
+            rows.append(row)
+            if len(rows) >= chunk_rows:
+                chunks.append(to_array(rows))
+                rows = []
+        if rows:
+            chunks.append(to_array(rows))
+    if not chunks:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate(chunks)
@@ -0,0 +1,265 @@
+"""
+        Registro delle modifiche (append-only) per correzioni e cancellazioni
+"""
+
+import copy
+import csv
+import os
+from datetime import datetime
+from pathlib import Path
+from .constants import RECORD_ENCODING
+
+UPDATE = 'update'
+DELETE = 'delete'
+INSERT = 'insert'
+
+
+class ChangeLog:
+    """
+         SCOPO DELLA CLASSE `ChangeLog`:
+         ==============================
+         Permette di correggere o cancellare record di un file CSV senza mai
+         riscriverlo durante il lavoro: le modifiche vengono solo *accodate*
+         in un file a parte (`<file>.changes`) e unite al volo dai lettori.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Voci del registro**: ogni riga contiene l'operazione (`update`,
+             `delete` o `insert`), l'istante, la chiave del record modificato e,
+             per gli aggiornamenti, il record completo con i nuovi valori (che
+             può avere anche una chiave diversa, es. correzione del Plot).
+             `insert` serve per salvare di nuovo un record con la chiave di
+             uno cancellato: accodarlo al file principale lo farebbe
+             confondere con la riga originale cancellata.
+         2.  **Indice delle chiavi**: il registro viene "riprodotto" una sola
+             volta in un indice in memoria:
+             -   `_slot_of`: chiave attuale -> chiave originale della riga del
+                 file principale ("slot") che la contiene;
+             -   `_state`: slot -> nuovo record, oppure `None` se cancellato
+                 (i record inseriti hanno uno slot proprio, `('+', n)`);
+             -   `_gone`: chiavi che non esistono più (rinominate o cancellate).
+             Le nuove voci aggiornano l'indice in modo incrementale.
+         3.  **Lettura**: `merge(rows)` scorre le righe del file principale e
+             sostituisce o salta quelle presenti nell'indice, mantenendo
+             l'ordine originale dei record; i record inseriti seguono in coda.
+         4.  **Compattazione**: `CSVModel.compact()` riscrive il file principale
+             con le modifiche di una copia dell'indice (`snapshot()`) e poi
+             toglie dal registro solo le voci già applicate (`drop_head()`);
+             va eseguita in un thread separato, mai nel thread
+             dell'interfaccia.
+    """
+
+    def __init__(self, main_file, fields, key_fields):
+        self.path = Path(str(main_file) + '.changes')
+        self.fields = list(fields)
+        self.key_fields = tuple(key_fields)
+        self.key_columns = [f'Key {field}' for field in self.key_fields]
+        self._loaded = False
+        self._slot_of = dict()
+        self._state = dict()
+        self._gone = set()
+        self._inserts = 0
+        self.entries = 0
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        with open(self.path, newline='', encoding=RECORD_ENCODING) as fh:
+            for row in csv.DictReader(fh):
+                key = tuple(row[column] for column in self.key_columns)
+                if row['Op'] == DELETE:
+                    self._apply_delete(key)
+                elif row['Op'] == INSERT:
+                    self._apply_insert(key, {f: row[f] for f in self.fields})
+                else:
+                    self._apply_update(key, {f: row[f] for f in self.fields})
+                self.entries += 1
+
+    def _slot(self, key):
+        if key in self._slot_of:
+            return self._slot_of[key]
+        if key in self._gone:
+            return None
+        return key
+
+    def _new_key(self, record):
+        return tuple(str(record.get(field) or '') for field in self.key_fields)
+
+    def _apply_update(self, key, record):
+        slot = self._slot(key)
+        new_key = self._new_key(record)
+        self._state[slot] = record
+        if new_key != key:
+            self._slot_of.pop(key, None)
+            self._gone.add(key)
+            self._gone.discard(new_key)
+            self._slot_of[new_key] = slot
+
+    def _apply_delete(self, key):
+        slot = self._slot(key)
+        self._state[slot] = None
+        self._slot_of.pop(key, None)
+        self._gone.add(key)
+
+    def _apply_insert(self, key, record):
+        slot = ('+', self._inserts)
+        self._inserts += 1
+        self._state[slot] = record
+        self._slot_of[key] = slot
+        self._gone.discard(key)
+
+    def is_gone(self, key):
+        """True se `key` apparteneva a un record cancellato o rinominato."""
+        self._load()
+        return key in self._gone
+
+    def append(self, op, key, record=None):
+        """Accoda una voce al registro e aggiorna l'indice in memoria."""
+        self._load()
+        newfile = not self.path.exists()
+        with open(self.path, 'a', newline='', encoding=RECORD_ENCODING) as fh:
+            writer = csv.DictWriter(
+                fh, fieldnames=['Op', 'Timestamp', *self.key_columns, *self.fields]
+            )
+            if newfile:
+                writer.writeheader()
+            row = dict(record or {})
+            row.update(zip(self.key_columns, key))
+            row['Op'] = op
+            row['Timestamp'] = datetime.now().isoformat(timespec='seconds')
+            writer.writerow(row)
+        if op == DELETE:
+            self._apply_delete(key)
+        elif op == INSERT:
+            self._apply_insert(key, {f: (record or {}).get(f, '') for f in self.fields})
+        else:
+            self._apply_update(key, {f: (record or {}).get(f, '') for f in self.fields})
+        self.entries += 1
+
+    def apply_to_keys(self, keys):
+        """Aggiorna un insieme di chiavi del file principale con il registro."""
+        self._load()
+        keys.difference_update(self._gone)
+        for key, slot in self._slot_of.items():
+            if self._state.get(slot) is not None:
+                keys.add(key)
+        return keys
+
+    def resolve(self, key):
+        """
+    Cerca la riga del file principale con chiave `key` nell'indice.
+
+    Returns:
+        tuple: (True, nuovo record o None se cancellato) se la riga è stata
+        modificata, altrimenti (False, None).
+    """
+        self._load()
+        if key in self._state:
+            return True, self._state[key]
+        return False, None
+
+    def current(self, key):
+        """
+    Cerca la versione attuale del record con chiave `key` nell'indice.
+
+    Returns:
+        tuple: (True, record) se la versione attuale è nel registro,
+        altrimenti (False, None): il record è la riga del file principale
+        con chiave `key`.
+    """
+        self._load()
+        slot = self._slot(key)
+        if slot is not None and slot in self._state:
+            return True, self._state[slot]
+        return False, None
+
+    def inserted(self):
+        """I record inseriti tramite il registro (non ancora nel file principale)."""
+        self._load()
+        return [
+            record for slot, record in self._state.items()
+            if slot[0] == '+' and record is not None
+        ]
+
+    def merge(self, rows, record_key):
+        """
+    Unisce al volo il registro alle righe del file principale.
+
+    Args:
+        rows: le righe (dizionari) del file principale, in ordine.
+        record_key: funzione che calcola la chiave di una riga.
+
+    Yields:
+        dict: i record aggiornati, senza quelli cancellati.
+    """
+        self._load()
+        state = self._state
+        if not state:
+            yield from rows
+            return
+        for row in rows:
+            slot = record_key(row)
+            if slot in state:
+                record = state[slot]
+                if record is not None:
+                    yield record
+            else:
+                yield row
+        for slot, record in list(state.items()):
+            if slot[0] == '+' and record is not None:
+                yield record
+
+    def snapshot(self):
+        """
+    Una copia del registro com'è adesso, per la compattazione.
+
+    Returns:
+        tuple: (copia, dimensione in byte del file del registro). La copia
+        non cambia con le voci accodate dopo, che iniziano a quella
+        posizione del file.
+    """
+        self._load()
+        snapshot = copy.copy(self)
+        snapshot._slot_of = dict(self._slot_of)
+        snapshot._state = dict(self._state)
+        snapshot._gone = set(self._gone)
+        size = self.path.stat().st_size if self.path.exists() else 0
+        return snapshot, size
+
+    def drop_head(self, size):
+        """
+    Toglie dal registro le voci dei primi `size` byte (già applicate al file
+    principale dalla compattazione) e ricarica l'indice da quelle rimaste.
+    """
+        if not self.path.exists():
+            return self.clear()
+        with open(self.path, 'rb') as fh:
+            header = fh.readline()
+            fh.seek(size)
+            tail = fh.read()
+        if not tail:
+            return self.clear()
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'wb') as fh:
+            fh.write(header + tail)
+        os.replace(tmp, self.path)
+        self._slot_of.clear()
+        self._state.clear()
+        self._gone.clear()
+        self._inserts = 0
+        self.entries = 0
+        self._loaded = False
+
+    def clear(self):
+        """Svuota il registro (dopo la compattazione)."""
+        if self.path.exists():
+            os.remove(self.path)
+        self._slot_of.clear()
+        self._state.clear()
+        self._gone.clear()
+        self._inserts = 0
+        self.entries = 0
+        self._loaded = True
@@ -0,0 +1,147 @@
+"""
+        Grafici su tk.Canvas con decimazione dei punti
+"""
+
+import tkinter as tk
+
+
+def lttb(points, threshold):
+    """
+    Decima una serie con l'algoritmo "Largest-Triangle-Three-Buckets".
+
+    Mantiene il primo e l'ultimo punto e divide gli altri in `threshold - 2`
+    gruppi ("bucket"); da ogni gruppo sceglie il punto che forma il
+    triangolo più grande con il punto scelto nel gruppo precedente e con la
+    media del gruppo successivo. Così picchi e valli restano visibili anche
+    disegnando poche centinaia di punti su decine di migliaia.
+
+    Args:
+        points (list): coppie (x, y) ordinate per x.
+        threshold (int): il numero di punti da restituire.
+
+    Returns:
+        list: i punti scelti (tutti, se sono già meno di `threshold`).
+    """
+    size = len(points)
+    if threshold >= size or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    every = (size - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # media del gruppo successivo
+        start = int((i + 1) * every) + 1
+        end = min(int((i + 2) * every) + 1, size)
+        bucket = points[start:end] or [points[-1]]
+        avg_x = sum(p[0] for p in bucket) / len(bucket)
+        avg_y = sum(p[1] for p in bucket) / len(bucket)
+
+        # il punto del gruppo corrente con il triangolo più grande
+        ax, ay = points[a]
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+class LineChartView(tk.Canvas):
+    """
+  Un grafico a linee disegnato su un `tk.Canvas`.
+
+  Disegnare ogni record come elemento del Canvas rende Tk lentissimo dopo
+  qualche migliaio di punti. Qui ogni serie viene prima decimata con
+  `lttb` a circa un punto per pixel (al massimo `max_points`) e poi
+  disegnata con un'unica linea (`create_line` con tutte le coordinate): il
+  numero di elementi del Canvas non dipende dal numero di record.
+  Il grafico viene ridisegnato quando la finestra cambia dimensione.
+  """
+
+    margin = 50
+    colors = (
+        'blue', 'red', 'dark green', 'orange', 'purple', 'brown',
+        'magenta', 'teal', 'olive', 'navy'
+    )
+
+    def __init__(self, parent, x_label='', y_label='', x_format=str,
+                 max_points=500, **kwargs):
+        kwargs.setdefault('background', 'white')
+        kwargs.setdefault('width', 600)
+        kwargs.setdefault('height', 300)
+        super().__init__(parent, **kwargs)
+        self.x_label = x_label
+        self.y_label = y_label
+        self.x_format = x_format
+        self.max_points = max_points
+        self.series = dict()
+        self.bind('<Configure>', self._draw)
+
+    def set_series(self, series, y_label=None):
+        """
+    Imposta le serie da disegnare.
+
+    Args:
+        series (dict): nome -> lista di coppie (x, y) ordinate per x.
+    """
+        self.series = {name: points for name, points in series.items() if points}
+        if y_label is not None:
+            self.y_label = y_label
+        self._draw()
+
+    def _draw(self, *_):
+        self.delete('all')
+        width, height = self.winfo_width(), self.winfo_height()
+        if width <= 1:
+            width, height = int(self['width']), int(self['height'])
+        left, top = self.margin, self.margin // 2
+        right, bottom = width - self.margin // 2, height - self.margin
+        self.create_line(left, bottom, right, bottom)
+        self.create_line(left, bottom, left, top)
+        self.create_text((left + right) / 2, height - 10, text=self.x_label)
+        self.create_text(10, (top + bottom) / 2, text=self.y_label, angle=90)
+        if not self.series or right <= left or bottom <= top:
+            return
+
+        xs = [p[0] for points in self.series.values() for p in (points[0], points[-1])]
+        ys = [p[1] for points in self.series.values() for p in points]
+        x_min, x_max = min(xs), max(xs)
+        y_min, y_max = min(ys), max(ys)
+        x_span = (x_max - x_min) or 1
+        y_span = (y_max - y_min) or 1
+
+        def to_canvas(x, y):
+            return (
+                left + (x - x_min) / x_span * (right - left),
+                bottom - (y - y_min) / y_span * (bottom - top)
+            )
+
+        # assi: cinque etichette per asse
+        for i in range(5):
+            x = x_min + x_span * i / 4
+            cx, _ = to_canvas(x, y_min)
+            self.create_line(cx, bottom, cx, bottom + 4)
+            self.create_text(cx, bottom + 14, text=self.x_format(x))
+            y = y_min + y_span * i / 4
+            _, cy = to_canvas(x_min, y)
+            self.create_line(left - 4, cy, left, cy)
+            self.create_text(left - 6, cy, text=f'{y:.1f}', anchor=tk.E)
+
+        threshold = min(self.max_points, max(3, int(right - left)))
+        for index, (name, points) in enumerate(self.series.items()):
+            color = self.colors[index % len(self.colors)]
+            coords = []
+            for x, y in lttb(points, threshold):
+                coords.extend(to_canvas(x, y))
+            if len(coords) >= 4:
+                self.create_line(*coords, fill=color, width=1)
+            else:
+                cx, cy = coords
+                self.create_oval(cx - 2, cy - 2, cx + 2, cy + 2, fill=color, outline=color)
+            self.create_text(
+                right - 5, top + 12 * index, text=name, fill=color, anchor=tk.NE
+            )
@@ -2,8 +2,15 @@
     Questa classe è stata creata per indicare quali tipi i campi andiamo a salvare nel nostro modello.
 """
 
+import locale
 from enum import Enum, auto
 
+# la codifica dei file di record (CSV, registri delle modifiche, archivi
+# importati): quella predefinita del sistema, con cui `CSVModel` ha sempre
+# scritto i suoi file. Tutte le letture e le scritture, anche quelle in
+# binario (code, pagine, blocchi paralleli), devono usare questa.
+RECORD_ENCODING = locale.getpreferredencoding(False)
+
 
 class FieldTypes(Enum):
     """
@@ -0,0 +1,230 @@
+"""
+        Lettura a blocchi di file CSV (quote-aware)
+"""
+
+import csv
+import sys
+from .changelog import ChangeLog
+from .constants import RECORD_ENCODING
+
+QUOTE = b'"'
+NEWLINE = b'\n'
+
+
+def record_boundary(data, quoted=False):
+    """
+    Trova la fine dell'ultimo record completo contenuto in `data`.
+
+    Un a capo chiude un record solo se non si trova dentro un campo tra
+    virgolette: i campi Notes possono contenere degli a capo. Un campo è
+    "aperto" quando il numero di virgolette lette finora è dispari (le
+    virgolette raddoppiate `""` usate come escape non cambiano la parità).
+
+    Args:
+        data (bytes): i byte letti.
+        quoted (bool): True se all'inizio di `data` ci si trova già dentro
+            un campo tra virgolette.
+
+    Returns:
+        int: la posizione subito dopo l'ultimo a capo valido, 0 se `data`
+        non contiene nessun record completo.
+    """
+    total = data.count(QUOTE) + quoted
+    end = len(data)
+    while True:
+        pos = data.rfind(NEWLINE, 0, end)
+        if pos < 0:
+            return 0
+        # virgolette che seguono questo a capo
+        after = data.count(QUOTE, pos, end)
+        total -= after
+        if total % 2 == 0:
+            return pos + 1
+        end = pos
+
+
+def iter_chunks(fh, chunk_size=1 << 22, quote_aware=True):
+    """
+    Divide un file binario in blocchi che terminano sempre a fine record.
+
+    Ogni blocco può essere analizzato in modo indipendente (ad esempio da un
+    processo diverso) con `csv.reader`, perché non spezza mai un record a
+    metà, nemmeno quando un campo tra virgolette contiene degli a capo.
+
+    Args:
+        fh: file aperto in modalità binaria, posizionato dove iniziare.
+        chunk_size (int): dimensione indicativa dei blocchi in byte.
+        quote_aware (bool): se False spezza a ogni a capo (JSON-lines).
+
+    Yields:
+        bytes: blocchi di record completi.
+    """
+    pending = b''
+    while True:
+        data = fh.read(chunk_size)
+        if not data:
+            break
+        data = pending + data
+        if quote_aware:
+            cut = record_boundary(data)
+        else:
+            cut = data.rfind(NEWLINE) + 1
+        if cut == 0:
+            # nessun record completo: un campo molto lungo, continua a leggere
+            pending = data
+            continue
+        pending = data[cut:]
+        yield data[:cut]
+    if pending:
+        yield pending
+
+
+def iter_raw_records(fh, offset=0):
+    """
+    Scorre un file binario record per record, riportando la posizione.
+
+    A differenza di `csv.reader`, conosce l'offset in byte di ogni record:
+    serve per indici sparsi, paginazione e lettura incrementale.
+
+    Yields:
+        tuple: (offset del record, byte del record incluso l'a capo)
+    """
+    fh.seek(offset)
+    start = offset
+    parts = []
+    quoted = False
+    for line in fh:
+        parts.append(line)
+        if line.count(QUOTE) % 2:
+            quoted = not quoted
+        if quoted:
+            continue
+        record = b''.join(parts) if len(parts) > 1 else line
+        parts.clear()
+        yield start, record
+        start += len(record)
+    if parts:
+        yield start, b''.join(parts)
+
+
+class ValueDictionary:
+    """
+    Il dizionario di codifica di una colonna: valore <-> codice intero.
+
+    Ogni valore distinto è memorizzato una sola volta (con `sys.intern`):
+    le celle che lo contengono condividono lo stesso oggetto stringa invece
+    di allocarne uno nuovo per riga, e il codice permette confronti e
+    raggruppamenti tra interi.
+    """
+
+    def __init__(self, values=()):
+        self.values = []
+        self.codes = dict()
+        for value in values:
+            self.code(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        """Il codice di `value`, aggiunto al dizionario se è nuovo."""
+        code = self.codes.get(value)
+        if code is None:
+            value = sys.intern(value)
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def intern(self, value):
+        """L'unica istanza condivisa di `value`."""
+        return self.values[self.code(value)]
+
+
+class CategoryEncoder:
+    """
+         SCOPO DELLA CLASSE `CategoryEncoder`:
+         ====================================
+         Codifica "a dizionario" le colonne con pochi valori distinti (es. Lab,
+         Time, Plot, Technician) mentre i record vengono letti in streaming.
+
+         Un lettore CSV alloca una nuova stringa per ogni cella: con milioni di
+         righe, milioni di copie di 'A' o '8:00'. Passando le righe per
+         l'encoder ogni cella viene sostituita dall'istanza condivisa del
+         valore, quindi i dati in memoria occupano lo spazio di un puntatore
+         per cella. Le colonne con `values` nello schema partono con quei
+         valori, così i loro codici coincidono con la posizione in `values`;
+         i valori non previsti vengono aggiunti in coda.
+    """
+
+    def __init__(self, fields, names=None):
+        if names is None:
+            names = [key for key, spec in fields.items() if 'values' in spec]
+        self.dictionaries = {
+            key: ValueDictionary(fields[key].get('values', ())) for key in names
+        }
+
+    def intern_dict(self, row):
+        """Sostituisce (sul posto) i valori di categoria di un dizionario."""
+        for key, dictionary in self.dictionaries.items():
+            value = row.get(key)
+            if value:
+                row[key] = dictionary.intern(value)
+        return row
+
+    def intern_rows(self, rows):
+        """Applica `intern_dict` a una sequenza di righe, in streaming."""
+        intern_dict = self.intern_dict
+        for row in rows:
+            yield intern_dict(row)
+
+    def list_interner(self, names):
+        """
+    Restituisce una funzione che codifica sul posto le righe in forma di
+    lista ordinate secondo `names`.
+    """
+        targets = [
+            (position, self.dictionaries[name].intern)
+            for position, name in enumerate(names) if name in self.dictionaries
+        ]
+
+        def intern_list(row):
+            for position, intern in targets:
+                if row[position]:
+                    row[position] = intern(row[position])
+            return row
+        return intern_list
+
+
+def iter_canonical_rows(path, names, key_fields=(), encoder=None):
+    """
+    Le righe di un file come liste nell'ordine di `names`.
+
+    Le colonne vengono associate per nome (l'ordine può cambiare da file a
+    file); se il file ha un registro delle modifiche (e sono indicati i
+    campi chiave), viene applicato. Con un `CategoryEncoder` le colonne di
+    categoria vengono codificate durante la lettura.
+    """
+    with open(path, newline='', encoding=RECORD_ENCODING) as fh:
+        reader = csv.reader(fh)
+        header = next(reader, None)
+        if not header:
+            return
+        intern = encoder.list_interner(names) if encoder else (lambda row: row)
+        changelog = ChangeLog(path, names, key_fields)
+        if key_fields and changelog.path.exists():
+            rows = changelog.merge(
+                (dict(zip(header, row)) for row in reader),
+                lambda row: tuple(row.get(f, '') for f in key_fields)
+            )
+            for row in rows:
+                yield intern([row.get(name, '') or '' for name in names])
+            return
+        positions = [
+            header.index(name) if name in header else None for name in names
+        ]
+        width = len(header)
+        for row in reader:
+            if len(row) < width:
+                row = row + [''] * (width - len(row))
+            yield intern([row[p] if p is not None else '' for p in positions])
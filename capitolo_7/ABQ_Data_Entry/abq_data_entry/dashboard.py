@@ -0,0 +1,75 @@
+"""
+        Statistiche incrementali per il cruscotto dei supervisori
+"""
+
+from collections import Counter
+from datetime import datetime
+
+
+class DashboardStats:
+    """
+    I contatori del cruscotto, aggiornati riga per riga.
+
+    -   `per_hour`: record arrivati per (tecnico, ora), dove l'ora è quella
+        in cui il record è stato letto (i record non hanno l'orario di
+        salvataggio, solo lo slot `Time`). Contano solo i record arrivati
+        mentre il cruscotto è aperto: per quelli già presenti all'apertura,
+        o riletti dopo una compattazione, l'ora di arrivo non è nota;
+    -   `per_technician`: tutti i record di oggi per tecnico;
+    -   `plots`: i Plot salvati per ogni (Lab, Time);
+    -   `faults`: i record con `Equipment Fault` per Lab.
+
+    Aggiornare costa quanto il numero di righe nuove; `merge` unisce le
+    statistiche di più file (una per file, così un file sostituito può
+    essere ricontato da zero senza toccare gli altri).
+    """
+
+    def __init__(self):
+        self.per_hour = Counter()
+        self.per_technician = Counter()
+        self.plots = dict()
+        self.faults = Counter()
+        self.records = 0
+
+    def add(self, rows, arrived=True, now=None):
+        """
+        Aggiunge le righe lette; con `arrived=False` (righe già presenti o
+        rilette) non vengono contate nell'ora corrente.
+        """
+        if arrived:
+            rows = list(rows)
+            self.add_arrivals(rows, now)
+        for row in rows:
+            self.records += 1
+            self.per_technician[row.get('Technician') or ''] += 1
+            slot = (row.get('Lab') or '', row.get('Time') or '')
+            self.plots.setdefault(slot, set()).add(row.get('Plot') or '')
+            if (row.get('Equipment Fault') or '').lower() in ('true', '1', '1.0'):
+                self.faults[row.get('Lab') or ''] += 1
+
+    def add_arrivals(self, rows, now=None):
+        """Conta le righe come arrivate nell'ora corrente (solo `per_hour`)."""
+        hour = (now or datetime.now()).hour
+        for row in rows:
+            self.per_hour[(row.get('Technician') or '', hour)] += 1
+
+    def merge(self, other):
+        self.per_hour.update(other.per_hour)
+        self.per_technician.update(other.per_technician)
+        for slot, plots in other.plots.items():
+            self.plots.setdefault(slot, set()).update(plots)
+        self.faults.update(other.faults)
+        self.records += other.records
+        return self
+
+    def technicians(self):
+        """Per tecnico: (record nell'ora corrente, nell'ora precedente, totale)."""
+        hour = datetime.now().hour
+        return {
+            technician: (
+                self.per_hour[(technician, hour)],
+                self.per_hour[(technician, (hour - 1) % 24)],
+                total,
+            )
+            for technician, total in self.per_technician.items()
+        }
@@ -0,0 +1,116 @@
+"""
+        Coda per inviare aggiornamenti dell'interfaccia dai thread di lavoro
+"""
+
+import queue
+import threading
+import time
+
+
+class UIDispatcher:
+    """
+         SCOPO DELLA CLASSE `UIDispatcher`:
+         =================================
+         Tkinter non è thread-safe: i thread di lavoro (salvataggi,
+         compattazione, sincronizzazione, sensori) non devono toccare i
+         widget né le variabili Tk. Con `post()` consegnano invece una
+         callback che verrà eseguita nel thread di Tk.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Coda**: `post()` mette la callback in una `queue.SimpleQueue`
+             e può essere chiamato da qualunque thread.
+         2.  **Consegna a lotti**: un solo `after()` ogni `interval` ms
+             svuota la coda, al massimo `max_batch` callback per giro (il
+             resto al giro successivo, subito): l'interfaccia resta reattiva
+             anche con molti messaggi.
+         3.  **Accorpamento**: le callback inviate con la stessa `key`
+             (es. 'status') si sostituiscono finché non vengono consegnate:
+             cento aggiornamenti di avanzamento diventano uno solo.
+         4.  **Metriche**: `stats()` riporta callback inviate, consegnate e
+             accorpate, la profondità della coda (attuale e massima) e la
+             latenza fra `post()` e l'esecuzione (media e massima, in ms).
+    """
+
+    def __init__(self, root, interval=20, max_batch=200):
+        self.root = root
+        self.interval = interval
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._keyed = dict()
+        self._lock = threading.Lock()
+        self._job = None
+        self.posted = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def start(self):
+        if self._job is None:
+            self._job = self.root.after(self.interval, self._drain)
+
+    def stop(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def post(self, callback, *args, key=None):
+        """
+    Chiede di eseguire `callback(*args)` nel thread di Tk.
+
+    Args:
+        key: se indicata, una callback con la stessa chiave ancora in coda
+            viene sostituita da questa (conta solo l'ultimo aggiornamento).
+    """
+        entry = (time.perf_counter(), callback, args)
+        with self._lock:
+            self.posted += 1
+            if key is not None:
+                if key in self._keyed:
+                    self._keyed[key] = entry
+                    self.coalesced += 1
+                    return
+                self._keyed[key] = entry
+                entry = key
+            depth = self._queue.qsize() + 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._queue.put((key is not None, entry))
+
+    def _drain(self):
+        for _ in range(self.max_batch):
+            try:
+                keyed, entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if keyed:
+                with self._lock:
+                    entry = self._keyed.pop(entry)
+            posted, callback, args = entry
+            latency = time.perf_counter() - posted
+            self.delivered += 1
+            self.total_latency += latency
+            if latency > self.max_latency:
+                self.max_latency = latency
+            try:
+                callback(*args)
+            except Exception as e:
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+        backlog = not self._queue.empty()
+        self._job = self.root.after(0 if backlog else self.interval, self._drain)
+
+    def stats(self):
+        """Le metriche della coda (latenze in millisecondi)."""
+        return {
+            'posted': self.posted,
+            'delivered': self.delivered,
+            'coalesced': self.coalesced,
+            'depth': self._queue.qsize(),
+            'max_depth': self.max_depth,
+            'mean_latency_ms': (
+                self.total_latency / self.delivered * 1000 if self.delivered else 0.0
+            ),
+            'max_latency_ms': self.max_latency * 1000,
+        }
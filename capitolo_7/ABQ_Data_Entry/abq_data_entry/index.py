@@ -0,0 +1,186 @@
+"""
+        Indici delle chiavi dei record (hash set e filtro di Bloom)
+"""
+
+import csv
+import hashlib
+import json
+import math
+from pathlib import Path
+from .constants import RECORD_ENCODING
+from .stores import write_cache
+
+
+class BloomFilter:
+    """
+    Un filtro di Bloom: un insieme probabilistico molto compatto.
+
+    `might_contain` può dare falsi positivi (con probabilità circa
+    `error_rate` finché gli elementi non superano `capacity`) ma mai falsi
+    negativi: se risponde False, la chiave sicuramente non è presente.
+
+    Le `k` posizioni di ogni chiave sono ricavate con il "double hashing"
+    da un'unica impronta BLAKE2b di 128 bit.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01, bits=None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.size = size
+        self.hashes = max(1, round(size / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(
+            '\x1f'.join(key).encode('utf-8'), digest_size=16
+        ).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        """
+    Aggiunge una chiave; `count` cresce solo per le chiavi nuove, così
+    rileggere un file già indicizzato non gonfia il conteggio.
+    """
+        new = False
+        bits = self.bits
+        for pos in self._positions(key):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        if new:
+            self.count += 1
+
+    def might_contain(self, key):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def read_keys(path, key_fields):
+    """Legge le chiavi di tutti i record di un file CSV."""
+    keys = set()
+    with open(path, newline='', encoding=RECORD_ENCODING) as fh:
+        reader = csv.reader(fh)
+        header = next(reader, None)
+        if not header:
+            return keys
+        try:
+            indexes = [header.index(field) for field in key_fields]
+        except ValueError:
+            return keys  # file senza i campi chiave (es. un archivio legacy)
+        width = max(indexes)
+        for row in reader:
+            if len(row) > width:
+                keys.add(tuple(row[i] for i in indexes))
+    return keys
+
+
+class ArchiveIndex:
+    """
+         SCOPO DELLA CLASSE `ArchiveIndex`:
+         =================================
+         Un filtro di Bloom delle chiavi di *tutti* i file di record di una
+         cartella, per controllare i duplicati tra giorni diversi senza
+         leggere l'intero archivio a ogni salvataggio.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Costruzione pigra**: il filtro viene costruito (o caricato) solo
+             al primo controllo che ne ha bisogno.
+         2.  **Persistenza**: il filtro viene salvato in `abq_keys.bloom`,
+             preceduto da un manifesto JSON con la dimensione di ogni file
+             indicizzato. Al caricamento vengono indicizzati solo i file nuovi
+             o cambiati (un filtro di Bloom può solo crescere: le chiavi in più
+             producono al massimo qualche falso positivo in più).
+         3.  **Ricostruzione**: se le chiavi superano la capacità, il filtro
+             viene ricostruito con capacità doppia per mantenere basso
+             l'errore.
+         4.  **Salvataggi**: `add()` aggiorna solo la memoria; il filtro e il
+             manifesto vengono scritti da `flush()` (chiamato dal modello
+             periodicamente e alla chiusura), non a ogni record.
+    """
+
+    filename = 'abq_keys.bloom'
+    pattern = 'abq_data_record_*.csv'
+
+    def __init__(self, directory, key_fields, capacity=1_000_000):
+        self.directory = Path(directory)
+        self.path = self.directory / self.filename
+        self.key_fields = key_fields
+        self.capacity = capacity
+        self.bloom = None
+        self.manifest = dict()
+        self.dirty = False
+
+    def _files(self):
+        return sorted(self.directory.glob(self.pattern))
+
+    def _load(self):
+        if self.path.exists():
+            try:
+                with open(self.path, 'rb') as fh:
+                    header = json.loads(fh.readline())
+                    bits = bytearray(fh.read())
+                self.bloom = BloomFilter(header['capacity'], header['error_rate'], bits)
+                self.bloom.count = header['count']
+                self.manifest = header['manifest']
+            except (ValueError, KeyError):
+                self.bloom = None
+        if self.bloom is None or len(self.bloom.bits) * 8 < self.bloom.size:
+            self.bloom = BloomFilter(self.capacity)
+            self.manifest = dict()
+        self.refresh()
+
+    def refresh(self):
+        """Indicizza i file nuovi o modificati dall'ultimo salvataggio."""
+        changed = False
+        for path in self._files():
+            size = path.stat().st_size
+            if self.manifest.get(path.name) == size:
+                continue
+            for key in read_keys(path, self.key_fields):
+                self.bloom.add(key)
+            self.manifest[path.name] = size
+            changed = True
+        if self.bloom.count > self.bloom.capacity:
+            self.capacity = self.bloom.capacity * 2
+            self.bloom = BloomFilter(self.capacity)
+            self.manifest = dict()
+            return self.refresh()
+        if changed:
+            self.save()
+
+    def save(self):
+        header = {
+            'capacity': self.bloom.capacity,
+            'error_rate': self.bloom.error_rate,
+            'count': self.bloom.count,
+            'manifest': self.manifest,
+        }
+        data = json.dumps(header).encode('utf-8') + b'\n' + bytes(self.bloom.bits)
+        if write_cache(self.path, data):
+            self.dirty = False
+
+    def flush(self):
+        """Salva il filtro se è cambiato dall'ultimo salvataggio."""
+        if self.dirty and self.bloom is not None:
+            self.save()
+
+    def might_contain(self, key):
+        if self.bloom is None:
+            self._load()
+        return self.bloom.might_contain(key)
+
+    def add(self, path, keys):
+        """Registra le chiavi appena scritte in `path`."""
+        if self.bloom is None:
+            return  # verranno lette dal file al primo caricamento
+        for key in keys:
+            self.bloom.add(key)
+        if path.exists() and path.match(self.pattern):
+            self.manifest[path.name] = path.stat().st_size
+        self.dirty = True
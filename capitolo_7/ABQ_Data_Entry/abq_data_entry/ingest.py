@@ -0,0 +1,357 @@
+"""
+        Importazione in blocco dei record, senza interfaccia grafica
+"""
+
+import csv
+import io
+import json
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from .constants import RECORD_ENCODING
+from .csvio import iter_chunks
+from .validation import RecordValidator
+
+JSONL_SUFFIXES = ('.jsonl', '.ndjson', '.json')
+
+
+def read_csv_records(path):
+    """
+    Legge un file CSV riga per riga (streaming).
+
+    Yields:
+        tuple: (riga del file in cui inizia il record, dizionario della riga)
+    """
+    with open(path, newline='', encoding=RECORD_ENCODING) as fh:
+        reader = csv.DictReader(fh)
+        start = 2
+        for row in reader:
+            yield start, row
+            start = reader.line_num + 1
+
+
+def read_jsonl_records(path):
+    """
+    Legge un file JSON-lines (un oggetto JSON per riga), tipico dei logger
+    portatili. Le righe vuote vengono ignorate; una riga non valida produce
+    un dizionario vuoto con la chiave speciale `None` che ne descrive l'errore.
+    """
+    with open(path, encoding=RECORD_ENCODING) as fh:
+        yield from read_jsonl_lines(fh, 1)
+
+
+def read_records(path):
+    """Sceglie il lettore in base all'estensione del file."""
+    if Path(path).suffix.lower() in JSONL_SUFFIXES:
+        return read_jsonl_records(path)
+    return read_csv_records(path)
+
+
+def read_header(path):
+    """Restituisce le colonne di un file CSV (lista vuota per JSON-lines)."""
+    if Path(path).suffix.lower() in JSONL_SUFFIXES:
+        return []
+    with open(path, newline='', encoding=RECORD_ENCODING) as fh:
+        return next(csv.reader(fh), [])
+
+
+def read_tsv_records(text, columns):
+    """
+    Legge righe separate da tabulazioni, come quelle copiate da un foglio
+    di calcolo negli appunti.
+
+    Se la prima riga contiene solo nomi di colonna noti (`columns`) viene
+    usata come intestazione, altrimenti le celle vengono assegnate alle
+    colonne nell'ordine di `columns`. Le righe vuote vengono ignorate.
+
+    Yields:
+        tuple: (numero della riga incollata, dizionario della riga)
+    """
+    known = set(columns)
+    lines = list(csv.reader(io.StringIO(text, newline=''), delimiter='\t'))
+    header = list(columns)
+    start = 1
+    if lines and all(cell.strip() in known for cell in lines[0] if cell.strip()):
+        header = [cell.strip() for cell in lines[0]]
+        lines = lines[1:]
+        start = 2
+    for line, cells in enumerate(lines, start=start):
+        if not any(cell.strip() for cell in cells):
+            continue
+        row = dict(zip(header, cells))
+        if len(cells) > len(header) and any(c.strip() for c in cells[len(header):]):
+            row[None] = 'Too many columns'
+        yield line, row
+
+
+def check_rows(rows, validator, model):
+    """
+    Valida in blocco delle righe e segnala anche i duplicati, senza salvare.
+
+    Serve per mostrare un'anteprima prima del salvataggio.
+
+    Returns:
+        list: tuple (riga, dati originali, record normalizzato o None, errori)
+    """
+    checked = []
+    for line, row in rows:
+        if None in row:
+            message = row.pop(None)
+            checked.append((line, row, None, {'Row': message}))
+            continue
+        record, errors = validator.validate(row)
+        checked.append((line, row, record, errors))
+    valid = [position for position, item in enumerate(checked) if item[2]]
+    duplicates = model.find_duplicates([checked[p][2] for p in valid])
+    for position, _ in duplicates:
+        line, row, _, _ = checked[valid[position]]
+        checked[valid[position]] = (line, row, None, {'Record': 'Duplicate record'})
+    return checked
+
+
+class IngestReport:
+    """Raccoglie l'esito di un'importazione: record accettati, scartati e motivi."""
+
+    def __init__(self, rejects_file=None, fields=()):
+        self.accepted = 0
+        self.rejected = 0
+        self.reasons = Counter()
+        self.file_errors = []
+        self.warnings = []
+        self._rejects_fh = None
+        self._rejects_writer = None
+        if rejects_file:
+            self._rejects_fh = open(rejects_file, 'w', newline='', encoding=RECORD_ENCODING)
+            self._rejects_writer = csv.DictWriter(
+                self._rejects_fh,
+                fieldnames=['File', 'Line', 'Reason', *fields],
+                extrasaction='ignore'
+            )
+            self._rejects_writer.writeheader()
+
+    def reject(self, path, line, row, errors):
+        self.rejected += 1
+        for key in errors:
+            self.reasons[key] += 1
+        if self._rejects_writer:
+            reason = '; '.join(f'{key}: {msg}' for key, msg in errors.items())
+            self._rejects_writer.writerow(
+                {**row, 'File': str(path), 'Line': line, 'Reason': reason}
+            )
+
+    def close(self):
+        if self._rejects_fh:
+            self._rejects_fh.close()
+            self._rejects_fh = None
+
+    def summary(self):
+        lines = [f'{self.accepted} records imported, {self.rejected} rejected']
+        for key, count in self.reasons.most_common():
+            lines.append(f'  {key}: {count}')
+        lines.extend(self.file_errors)
+        lines.extend(self.warnings)
+        return '\n'.join(lines)
+
+
+def validate_rows(rows, validator, report, path):
+    """Valida le righe in streaming, restituendo (riga, record) dei soli record validi."""
+    validate = validator.validate
+    for line, row in rows:
+        if None in row:
+            # righe con più colonne dell'intestazione, o JSON non valido
+            extra = row.pop(None)
+            message = extra if isinstance(extra, str) else 'Too many columns'
+            report.reject(path, line, row, {'Row': message})
+            continue
+        record, errors = validate(row)
+        if errors:
+            report.reject(path, line, row, errors)
+        else:
+            yield line, record
+
+
+# validatore del processo worker, creato una sola volta da `_init_worker`
+_worker_validator = None
+
+
+def _init_worker(fields):
+    global _worker_validator
+    _worker_validator = RecordValidator(fields)
+
+
+def write_batch(model, batch, report, path):
+    """
+    Scrive un lotto di (riga, record) validi, scartando i duplicati.
+
+    I record la cui chiave (Date, Time, Lab, Plot) è già presente
+    nell'archivio, o ripetuta nel lotto, vengono riportati come scartati.
+    """
+    records = [record for _, record in batch]
+    duplicates = model.find_duplicates(records)
+    if duplicates:
+        skip = set()
+        for position, _ in duplicates:
+            line, record = batch[position]
+            report.reject(path, line, record, {'Record': 'Duplicate record'})
+            skip.add(position)
+        records = [r for i, r in enumerate(records) if i not in skip]
+    if records:
+        report.accepted += model.save_records(records)
+
+
+def _parse_chunk(path, chunk, header, first_line):
+    """
+    Analizza e valida un blocco di record in un processo worker.
+
+    Returns:
+        tuple: (record validi, righe scartate come (riga, dati, errori))
+    """
+    text = chunk.decode(RECORD_ENCODING)
+    if header is None:
+        rows = read_jsonl_lines(io.StringIO(text), first_line)
+    else:
+        rows = read_csv_lines(io.StringIO(text, newline=''), header, first_line)
+    accepted = []
+    rejected = []
+    report = _ChunkReport(rejected)
+    accepted.extend(validate_rows(rows, _worker_validator, report, path))
+    return accepted, rejected
+
+
+class _ChunkReport:
+    """Raccoglie gli scarti di un blocco per restituirli al processo principale."""
+
+    def __init__(self, rejected):
+        self.rejected = rejected
+
+    def reject(self, path, line, row, errors):
+        self.rejected.append((line, row, errors))
+
+
+def read_csv_lines(fh, header, first_line):
+    """Come `read_csv_records`, ma per un blocco senza intestazione."""
+    reader = csv.DictReader(fh, fieldnames=header)
+    start = first_line
+    for row in reader:
+        yield start, row
+        start = first_line + reader.line_num
+
+
+def read_jsonl_lines(fh, first_line):
+    """Come `read_jsonl_records`, ma per un blocco già in memoria."""
+    for line_num, line in enumerate(fh, start=first_line):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            row = {None: f'Invalid JSON: {e.msg}'}
+        if not isinstance(row, dict):
+            row = {None: 'Invalid JSON: not an object'}
+        yield line_num, row
+
+
+def _iter_file_chunks(path, chunk_size):
+    """
+    Divide un file in blocchi di record completi.
+
+    Yields:
+        tuple: (intestazione o None per JSON-lines, blocco, prima riga del blocco)
+    """
+    jsonl = Path(path).suffix.lower() in JSONL_SUFFIXES
+    with open(path, 'rb') as fh:
+        header = None
+        line = 1
+        if not jsonl:
+            header = next(csv.reader([fh.readline().decode(RECORD_ENCODING)]), [])
+            line = 2
+        for chunk in iter_chunks(fh, chunk_size, quote_aware=not jsonl):
+            yield header, chunk, line
+            line += chunk.count(b'\n')
+
+
+def _parallel_ingest_file(path, executor, model, report, workers, chunk_size):
+    """
+    Distribuisce i blocchi di un file ai worker e scrive i risultati in ordine.
+
+    Al massimo `2 * workers` blocchi sono in elaborazione contemporaneamente,
+    così la memoria resta limitata anche per file molto grandi. I risultati
+    vengono raccolti nell'ordine di invio: un solo scrittore (questo
+    processo) accoda i record tramite `CSVModel`, preservando l'ordine
+    del file di ingresso.
+    """
+    in_flight = deque()
+
+    def drain_one():
+        accepted, rejected = in_flight.popleft().result()
+        for line, row, errors in rejected:
+            report.reject(path, line, row, errors)
+        if accepted:
+            write_batch(model, accepted, report, path)
+
+    for header, chunk, line in _iter_file_chunks(path, chunk_size):
+        in_flight.append(
+            executor.submit(_parse_chunk, str(path), chunk, header, line)
+        )
+        if len(in_flight) >= 2 * workers:
+            drain_one()
+    while in_flight:
+        drain_one()
+
+
+def ingest(paths, model, rejects_file=None, batch_size=5000, workers=1,
+           chunk_size=1 << 22):
+    """
+    Importa uno o più file nel `CSVModel` indicato.
+
+    I file vengono letti in streaming, ogni riga viene validata contro
+    `model.fields` e i record validi vengono scritti a lotti di `batch_size`
+    con `CSVModel.save_records`, così la memoria usata resta costante.
+
+    Con `workers > 1` l'analisi e la validazione vengono distribuite su un
+    `ProcessPoolExecutor`, a blocchi di circa `chunk_size` byte divisi
+    rispettando i campi tra virgolette; la scrittura resta sequenziale e
+    nell'ordine del file.
+
+    Returns:
+        IngestReport: l'esito dell'importazione.
+    """
+    validator = RecordValidator(model.fields)
+    report = IngestReport(rejects_file, fields=model.fields.keys())
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker, initargs=(model.fields,)
+        )
+    try:
+        for path in paths:
+            header = read_header(path)
+            missing, unknown = validator.check_header(header)
+            if header and missing:
+                report.file_errors.append(
+                    f'{path}: skipped, missing columns: {", ".join(missing)}'
+                )
+                continue
+            if unknown:
+                report.warnings.append(
+                    f'{path}: ignored columns: {", ".join(unknown)}'
+                )
+            if executor:
+                _parallel_ingest_file(
+                    path, executor, model, report, workers, chunk_size
+                )
+                continue
+            batch = []
+            for item in validate_rows(read_records(path), validator, report, path):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    write_batch(model, batch, report, path)
+                    batch.clear()
+            if batch:
+                write_batch(model, batch, report, path)
+    finally:
+        if executor:
+            executor.shutdown()
+        report.close()
+    return report
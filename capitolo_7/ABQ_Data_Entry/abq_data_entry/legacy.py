@@ -0,0 +1,149 @@
+"""
+        Normalizzazione dei file CSV delle versioni precedenti dell'applicazione
+"""
+
+import csv
+from datetime import datetime
+from .constants import RECORD_ENCODING
+
+# Le versioni dei capitoli 3, 4 e 5 salvavano le date nel formato del
+# widget (GG/MM/AAAA) e il campo Equipment Fault come numero (1.0 / 0.0).
+LEGACY_DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d')
+
+
+def _convert_date(value):
+    for date_format in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return value
+
+
+def _convert_boolean(value):
+    lowered = value.strip().lower()
+    if lowered in ('1', '1.0', 'true'):
+        return 'True'
+    if lowered in ('0', '0.0', 'false'):
+        return 'False'
+    return value
+
+
+def _convert_notes(value):
+    # il tk.Text dei vecchi capitoli aggiungeva sempre un a capo finale
+    return value[:-1] if value.endswith('\n') else value
+
+
+CONVERTERS = {
+    'Date': _convert_date,
+    'Equipment Fault': _convert_boolean,
+    'Notes': _convert_notes,
+}
+
+
+class LegacyNormalizer:
+    """
+         SCOPO DELLA CLASSE `LegacyNormalizer`:
+         =====================================
+         Riscrive i file CSV prodotti dalle versioni precedenti dell'applicazione
+         nello schema attuale (`CSVModel.fields`, nello stesso ordine).
+
+         I vecchi `on_save` usavano `fieldnames=data.keys()`, quindi ogni file
+         (e a volte ogni riga: il file di esempio del capitolo 3 ripete
+         l'intestazione con colonne diverse) ha le sue colonne.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Intestazione letta una volta**: per ogni intestazione viene
+             costruita una "mappa" di colonne: per ogni campo canonico,
+             l'indice della colonna corrispondente nel file (o `None`).
+         2.  **Cache delle mappe**: le mappe sono memorizzate in un dizionario
+             dell'istanza, per tupla di intestazione; gli archivi di anni diversi hanno poche
+             varianti di intestazione, quindi la mappa viene calcolata di rado.
+         3.  **Nessun dizionario per riga**: le righe vengono lette con
+             `csv.reader` come liste e riordinate per indice, senza creare
+             un `dict` per ogni record.
+         4.  **Intestazioni ripetute**: una riga che coincide con
+             un'intestazione valida (inizia con `Date` e contiene solo nomi
+             di campo noti) sostituisce la mappa corrente.
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self._known = frozenset(self.fields)
+        self.header_variants = set()
+        self.unknown_columns = set()
+        self._column_maps = dict()
+
+    def column_map(self, header):
+        """
+    Costruisce la mappa (campo canonico -> indice di colonna) per un'intestazione.
+
+    Args:
+        header (tuple): le colonne del file, nell'ordine del file.
+
+    Returns:
+        tuple: per ogni campo canonico, la coppia (indice o None, convertitore o None)
+    """
+        column_map = self._column_maps.get(header)
+        if column_map is None:
+            positions = {name.strip(): index for index, name in enumerate(header)}
+            column_map = self._column_maps[header] = tuple(
+                (positions.get(field), CONVERTERS.get(field))
+                for field in self.fields
+            )
+        return column_map
+
+    def is_header(self, row):
+        """Riconosce le intestazioni ripetute in mezzo al file."""
+        return bool(row) and row[0] == 'Date' and all(
+            cell.strip() in self._known for cell in row
+        )
+
+    def _use_header(self, row):
+        header = tuple(cell.strip() for cell in row)
+        self.header_variants.add(header)
+        self.unknown_columns.update(set(header) - self._known)
+        return self.column_map(header)
+
+    def iter_rows(self, path):
+        """
+    Legge un file legacy e produce righe nello schema canonico.
+
+    Yields:
+        list: i valori di ogni record, nell'ordine di `fields`.
+    """
+        with open(path, newline='', encoding=RECORD_ENCODING) as fh:
+            reader = csv.reader(fh)
+            first = next(reader, None)
+            if first is None:
+                return
+            mapping = self._use_header(first)
+            for row in reader:
+                if not row:
+                    continue
+                if self.is_header(row):
+                    mapping = self._use_header(row)
+                    continue
+                width = len(row)
+                out = []
+                for index, convert in mapping:
+                    if index is None or index >= width:
+                        out.append('')
+                    elif convert is None:
+                        out.append(row[index])
+                    else:
+                        out.append(convert(row[index]))
+                yield out
+
+    def normalize(self, paths, model):
+        """
+    Riscrive uno o più file legacy tramite il `CSVModel` indicato.
+
+    Returns:
+        int: il numero di record scritti.
+    """
+        written = 0
+        for path in paths:
+            written += model.save_rows(self.iter_rows(path))
+        return written
@@ -5,8 +5,52 @@
 import csv
 from pathlib import Path
 import os
-from .constants import FieldTypes as FT
-from datetime import datetime
+import shutil
+import threading
+from .aggregates import AggregateStore
+from .rollups import RollupStore
+from .arrays import load_records
+from .changelog import ChangeLog, UPDATE, DELETE, INSERT
+from .csvio import CategoryEncoder, iter_canonical_rows
+from .constants import FieldTypes as FT, RECORD_ENCODING
+from .index import ArchiveIndex, read_keys
+from .paging import RecordPager
+from .records import RecordBatch, make_record_class
+from .sketches import FieldSketches
+from .stores import file_signature, merge_stats
+from datetime import date, datetime
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def parse_record_date(value):
+    """Converte il campo `Date` di un record in `date` (None se non valido)."""
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _read_head(fh, size):
+    """
+    Le righe (testo) dei primi `size` byte di un file di record aperto in
+    binario: le righe accodate dopo aver letto `size` vengono ignorate.
+    """
+    for line in fh:
+        if size <= 0:
+            return
+        size -= len(line)
+        yield line.decode(RECORD_ENCODING)
+
+
+class DuplicateRecordError(ValueError):
+    """Sollevata quando si tenta di salvare un record con una chiave già presente."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        super().__init__(
+            'Duplicate record: ' + '; '.join(', '.join(key) for key in keys)
+        )
 
 
 class CSVModel:
@@ -91,6 +135,13 @@ class CSVModel:
         "Notes": {'req': False, 'type': FT.long_string}
     }
 
+    # i campi che identificano univocamente un record
+    key_fields = ('Date', 'Time', 'Lab', 'Plot')
+    # i campi con pochi valori distinti, codificati a dizionario in lettura
+    categorical_fields = ('Date', 'Time', 'Technician', 'Lab', 'Plot')
+    # numero di voci del registro delle modifiche oltre il quale compattare
+    compact_threshold = 200
+
     def __init__(self, filename=None):
         """Costruttore della classe CSVModel.
 
@@ -121,15 +172,177 @@ class CSVModel:
                      chiaramente il problema all'avvio dell'applicazione.
         """
         # se il nostro filename è vuoto usiamo il nome generato di default qui sotto
+        # e ricordiamo di ricalcolarlo a ogni salvataggio (cambio di giorno)
+        self._daily_file = not filename
         if not filename:
-            datestring = datetime.today().strftime("%Y-%m-%d")
-            filename = "abq_data_record_{}.csv".format(datestring)
+            filename = self.daily_filename()
         self.file = Path(filename)
+        self._check_permissions(self.file)
+        self._init_indexes()
+
+    def _init_indexes(self):
+        """
+        Prepara gli indici per il controllo dei duplicati.
+
+        -   `_key_index`: per ogni file in cui scriviamo (la partizione
+            attiva), l'insieme (hash set) delle chiavi già presenti, caricato
+            una sola volta e aggiornato a ogni salvataggio: controllo O(1).
+        -   `archive`: un filtro di Bloom sulle chiavi di tutto l'archivio,
+            per controllare a basso costo i record di altri giorni; viene
+            creato al primo utilizzo (vedi la proprietà `archive`).
+        """
+        self._key_index = dict()
+        self._changelogs = dict()
+        self._aggregates = dict()
+        self._rollups = dict()
+        self.encoder = CategoryEncoder(self.fields, self.categorical_fields)
+        self._lock = threading.RLock()
+        self._archive = None
+        self._keys_for(self.file)
+
+    @property
+    def archive(self):
+        """L'indice (`ArchiveIndex`) delle chiavi dell'archivio, creato al primo uso."""
+        if self._archive is None:
+            self._archive = ArchiveIndex(self.file.parent, self.key_fields)
+        return self._archive
+
+    def flush(self):
+        """
+        Scrive su disco gli indici tenuti in memoria (il filtro di Bloom con
+        il suo manifesto, gli aggregati e i riepiloghi). Va chiamato
+        periodicamente e alla chiusura.
+        """
+        with self._lock:
+            if self._archive is not None:
+                self._archive.flush()
+            for cache in (self._aggregates, self._rollups):
+                for store in cache.values():
+                    store.flush()
+
+    @staticmethod
+    def daily_filename(day=None):
+        """Il nome del file giornaliero, es. `abq_data_record_2023-10-27.csv`."""
+        day = day or datetime.today()
+        return "abq_data_record_{}.csv".format(day.strftime("%Y-%m-%d"))
+
+    def _rollover(self):
+        """
+        Passa al file del nuovo giorno se la sessione ha superato la mezzanotte.
+
+        Prima il nome veniva calcolato solo nel costruttore: una sessione
+        aperta la sera continuava a scrivere nel file del giorno precedente.
+        """
+        if self._daily_file:
+            filename = Path(self.daily_filename())
+            if filename != self.file:
+                self._check_permissions(filename)
+                self.file = filename
+                self._keys_for(self.file)
+
+    def record_key(self, data):
+        """La chiave di un record: (Date, Time, Lab, Plot) come stringhe."""
+        return tuple(
+            '' if data.get(field) is None else str(data.get(field))
+            for field in self.key_fields
+        )
+
+    def _keys_for(self, path):
+        """L'insieme delle chiavi presenti in `path`, letto una sola volta."""
+        keys = self._key_index.get(path)
+        if keys is None:
+            keys = read_keys(path, self.key_fields) if path.exists() else set()
+            changelog = self._changelog(path)
+            if changelog.path.exists():
+                changelog.apply_to_keys(keys)
+            self._key_index[path] = keys
+        return keys
+
+    def _changelog(self, path=None):
+        """Il registro delle modifiche di un file (per default quello attivo)."""
+        path = path or self.file
+        if path not in self._changelogs:
+            self._changelogs[path] = ChangeLog(path, self.fields, self.key_fields)
+        return self._changelogs[path]
+
+    def _target_file(self, data):
+        """Il file in cui verrà scritto `data`."""
+        return self.file
+
+    def _file_for_key(self, key):
+        """Il file che contiene il record con chiave `key` (per correzioni e cancellazioni)."""
+        return self.file
+
+    def _home_file(self, data):
+        """Il file giornaliero che dovrebbe contenere un record con questa data."""
+        day = parse_record_date(data.get('Date'))
+        if day is None:
+            return None
+        return self.file.parent / self.daily_filename(day)
+
+    def find_duplicates(self, records):
+        """
+        Cerca i record già presenti nell'archivio (o ripetuti all'interno
+        di `records` stesso).
+
+        1.  Il file di destinazione viene controllato con il suo hash set.
+        2.  Per gli altri file dell'archivio si interroga il filtro di Bloom;
+            solo se risponde "forse" i file vengono letti per confermare (e
+            i loro hash set restano in memoria): prima il file giornaliero
+            della data del record, poi tutti gli altri, perché un record
+            può essere stato salvato nel file di un altro giorno (es.
+            inserito in ritardo con la griglia o incollato).
+
+        Returns:
+            list: le coppie (posizione in `records`, chiave) dei duplicati.
+        """
+        seen = set()
+        duplicates = []
+        with self._lock:
+            for position, data in enumerate(records):
+                key = self.record_key(data)
+                target = self._target_file(data)
+                duplicate = key in seen or key in self._keys_for(target)
+                if (
+                        not duplicate and self._home_file(data) is not None
+                        and self.archive.might_contain(key)
+                ):
+                    duplicate = any(
+                        key in self._keys_for(path)
+                        for path in self._archive_candidates(data, target)
+                    )
+                if duplicate:
+                    duplicates.append((position, key))
+                seen.add(key)
+        return duplicates
+
+    def _archive_candidates(self, data, target):
+        """
+        I file dell'archivio (escluso `target`) che possono contenere la
+        chiave di `data`, a partire dal file giornaliero della sua data.
+        """
+        home = self._home_file(data)
+        paths = [home] if home is not None and home.exists() else []
+        paths += [path for path in self.archive_files() if path != home]
+        return [path for path in paths if path != target]
+
+    def _index_records(self, records):
+        """Aggiorna gli indici con i record appena scritti."""
+        written = dict()
+        for data in records:
+            key = self.record_key(data)
+            target = self._target_file(data)
+            self._keys_for(target).add(key)
+            written.setdefault(target, []).append(key)
+        for path, keys in written.items():
+            self.archive.add(path, keys)
 
-        # Check for append permissions:
-        file_exists = os.access(self.file, os.F_OK)
-        parent_writeable = os.access(self.file.parent, os.W_OK)
-        file_writeable = os.access(self.file, os.W_OK)
+    @staticmethod
+    def _check_permissions(filename):
+        """Verifica in anticipo di poter creare il file o accodarvi righe."""
+        file_exists = os.access(filename, os.F_OK)
+        parent_writeable = os.access(filename.parent, os.W_OK)
+        file_writeable = os.access(filename, os.W_OK)
         if (
                 (not file_exists and not parent_writeable) or
                 (file_exists and not file_writeable)
@@ -167,11 +380,464 @@ class CSVModel:
     """
     def save_record(self, data):
         """Save a dict of data to the CSV file"""
-        newfile = not self.file.exists()
+        self.save_records([data])
+
+    def save_records(self, records):
+        """
+        Salva una sequenza di record aprendo il file una sola volta.
+
+        È la variante "a lotti" di `save_record`, usata dall'importazione in
+        blocco: aprire e chiudere il file per ogni riga sarebbe il costo
+        dominante quando i record sono centinaia di migliaia.
+
+        Prima di scrivere controlla i duplicati: se anche un solo record ha
+        una chiave già presente, nessun record viene scritto e viene
+        sollevata una `DuplicateRecordError`.
+
+        Returns:
+            int: il numero di record scritti.
+        """
+        with self._lock:
+            self._rollover()
+            records = list(records)
+            self._raise_on_duplicates(records)
+            newfile = not self.file.exists()
+            changelog = self._changelog()
+            stores = self._summary_stores(self.file)
+
+            with open(self.file, 'a', newline='', encoding=RECORD_ENCODING) as fh:
+                csvwriter = csv.DictWriter(fh, fieldnames=self.fields.keys())
+                if newfile:
+                    csvwriter.writeheader()
+
+                for data in records:
+                    key = self.record_key(data)
+                    if changelog.is_gone(key):
+                        # la chiave di un record cancellato: va nel registro
+                        changelog.append(INSERT, key, data)
+                    else:
+                        csvwriter.writerow(data)
+            self._index_records(records)
+            self._add_to_stores(stores, records)
+        return len(records)
+
+    def _raise_on_duplicates(self, records):
+        duplicates = self.find_duplicates(records)
+        if duplicates:
+            raise DuplicateRecordError([key for _, key in duplicates])
+
+    def save_rows(self, rows):
+        """
+        Salva righe già ordinate secondo `fields` (liste di valori).
+
+        Evita la creazione di un dizionario per ogni record: è usato dalla
+        normalizzazione degli archivi, che produce direttamente le righe
+        nell'ordine canonico.
+
+        Le righe non vengono controllate per i duplicati (sono archivi già
+        esistenti), ma le loro chiavi vengono aggiunte agli indici.
+
+        Returns:
+            int: il numero di righe scritte.
+        """
+        with self._lock:
+            self._rollover()
+            newfile = not self.file.exists()
+            names = list(self.fields.keys())
+            key_indexes = [names.index(field) for field in self.key_fields]
+            keys = self._keys_for(self.file)
+            stores = self._summary_stores(self.file)
+            written = []
+
+            with open(self.file, 'a', newline='', encoding=RECORD_ENCODING) as fh:
+                csvwriter = csv.writer(fh)
+                if newfile:
+                    csvwriter.writerow(names)
+
+                for row in rows:
+                    csvwriter.writerow(row)
+                    written.append(tuple(row[i] for i in key_indexes))
+                    data = dict(zip(names, row))
+                    for store in stores:
+                        store.add(data)
+            keys.update(written)
+            self.archive.add(self.file, written)
+            for store in stores:
+                store.touch()
+        return len(written)
+
+    def update_record(self, key, data):
+        """
+        Corregge il record identificato da `key` nel file attivo (nella sua
+        partizione per `PartitionedCSVModel`).
+
+        La correzione viene solo accodata al registro delle modifiche: il
+        file principale non viene riscritto, quindi l'operazione è veloce
+        qualunque sia la sua dimensione.
+
+        Raises:
+            KeyError: se il record non esiste.
+            DuplicateRecordError: se la nuova chiave appartiene a un altro record.
+        """
+        key = tuple(key)
+        with self._lock:
+            path = self._file_for_key(key)
+            keys = self._keys_for(path)
+            if key not in keys:
+                raise KeyError(f'Record not found: {", ".join(key)}')
+            new_key = self.record_key(data)
+            if new_key != key and new_key in keys:
+                raise DuplicateRecordError([new_key])
+            stores = self._summary_stores(path)
+            old = self._current_record(path, key) if stores else None
+            self._changelog(path).append(UPDATE, key, data)
+            keys.discard(key)
+            keys.add(new_key)
+            self.archive.add(path, [new_key])
+            self._edit_stores(stores, old, data)
+
+    def delete_record(self, key):
+        """
+        Cancella il record identificato da `key` nel file attivo (nella sua
+        partizione per `PartitionedCSVModel`), accodando una "tombstone" al
+        registro delle modifiche.
+
+        Raises:
+            KeyError: se il record non esiste.
+        """
+        key = tuple(key)
+        with self._lock:
+            path = self._file_for_key(key)
+            keys = self._keys_for(path)
+            if key not in keys:
+                raise KeyError(f'Record not found: {", ".join(key)}')
+            stores = self._summary_stores(path)
+            old = self._current_record(path, key) if stores else None
+            self._changelog(path).append(DELETE, key)
+            keys.discard(key)
+            self._edit_stores(stores, old)
+
+    def _current_record(self, path, key):
+        """La versione attuale del record `key` (dal registro o dal file)."""
+        found, record = self._changelog(path).current(key)
+        if found:
+            return record
+        with open(path, newline='', encoding=RECORD_ENCODING) as fh:
+            for row in csv.DictReader(fh):
+                if self.record_key(row) == key:
+                    return row
+        return None
+
+    @staticmethod
+    def _edit_stores(stores, old, new=None):
+        """Applica una correzione (o, senza `new`, una cancellazione) ai riepiloghi."""
+        if old is None:
+            return  # la firma non corrisponde più: verranno ricalcolati
+        for store in stores:
+            store.remove(old)
+            if new is not None:
+                store.add(new)
+            store.touch()
 
-        with open(self.file, 'a', newline='') as fh:
+    def get_all_records(self):
+        """
+        Legge (in streaming) tutti i record del file attivo, con le
+        correzioni e le cancellazioni del registro già applicate.
+
+        Yields:
+            dict: un record per volta, nell'ordine del file.
+        """
+        yield from self._read_records(self.file)
+
+    def _read_records(self, path):
+        """
+        Come `get_all_records`, per un file qualsiasi dell'archivio.
+
+        Il lock viene preso solo per aprire il file e fissarne la dimensione
+        insieme a una copia del registro delle modifiche: la lettura vede il
+        file com'era in quell'istante, anche se nel frattempo un altro thread
+        salva o compatta, senza bloccare i salvataggi.
+        """
+        with self._lock:
+            if not path.exists():
+                return
+            fh = open(path, 'rb')
+            size = os.fstat(fh.fileno()).st_size
+            changelog, _ = self._changelog(path).snapshot()
+        with fh:
+            rows = self.encoder.intern_rows(csv.DictReader(_read_head(fh, size)))
+            yield from changelog.merge(rows, self.record_key)
+
+    def archive_files(self, start=None, end=None):
+        """
+        I file di record dell'archivio (la cartella del file attivo).
+
+        I file giornalieri fuori dall'intervallo [start, end] vengono
+        scartati dal nome, senza aprirli.
+        """
+        prefix = 'abq_data_record_'
+        files = []
+        for path in sorted(self.file.parent.glob(ArchiveIndex.pattern)):
+            day = parse_record_date(path.stem[len(prefix):])
+            if day and ((start and day < start) or (end and day > end)):
+                continue
+            files.append(path)
+        if self.file.exists() and self.file not in files:
+            files.append(self.file)
+        return files
+
+    def query(self, start=None, end=None, lab=None):
+        """
+        Restituisce (in streaming) i record dell'archivio compresi tra
+        `start` ed `end` (date, estremi inclusi), eventualmente di un solo Lab.
+        """
+        low = start.isoformat() if start else ''
+        high = end.isoformat() if end else '9999-12-31'
+        for path in self.archive_files(start, end):
+            for row in self._read_records(path):
+                if low <= (row.get('Date') or '') <= high and \
+                        (not lab or row.get('Lab') == lab):
+                    yield row
+
+    def aggregates(self, path=None):
+        """
+        Gli aggregati (`AggregateStore`) di un file, per default quello attivo.
+
+        Vengono caricati una sola volta e ricalcolati dai record solo se non
+        corrispondono più al file (vedi `AggregateStore`). Come tutte le
+        letture dei riepiloghi avviene sotto il lock del modello: un
+        salvataggio in un altro thread non può aggiungere record mentre
+        vengono ricalcolati.
+        """
+        with self._lock:
+            return self._summary_store(self._aggregates, AggregateStore, path)
+
+    def rollups(self, path=None):
+        """
+        I riepiloghi orari e giornalieri (`RollupStore`) di un file, per
+        default quello attivo; caricati e ricalcolati come gli aggregati.
+        """
+        with self._lock:
+            return self._summary_store(self._rollups, RollupStore, path)
+
+    def _summary_store(self, cache, store_class, path=None, build=True):
+        """
+        Il riepilogo (`SummaryStore`) di un file.
+
+        Con `build=True` (letture) il riepilogo viene caricato, ricalcolato se
+        non corrisponde al file e completato se ha voci da ricalcolare. Con
+        `build=False` (scritture) non viene mai letto il file di record:
+        se il riepilogo non è aggiornato si restituisce None e la scrittura
+        lo ignora (verrà ricalcolato, nuovi record compresi, alla prima
+        lettura).
+        """
+        path = path or self.file
+        store = cache.get(path)
+        if store is None:
+            store = cache[path] = store_class(path)
+            store.load()
+        if store.signature != store.current_signature():
+            if not build and path.exists():
+                return None
+            store.rebuild(self._read_records(path))
+        elif build and store.stale:
+            store.refresh(self._read_records(path))
+        return store
+
+    def _summary_stores(self, path):
+        """
+        Gli aggregati e i riepiloghi aggiornati di un file, da prendere prima
+        di scriverci (senza i nuovi record) e aggiornare dopo.
+        """
+        stores = (
+            self._summary_store(self._aggregates, AggregateStore, path, build=False),
+            self._summary_store(self._rollups, RollupStore, path, build=False),
+        )
+        return [store for store in stores if store is not None]
+
+    @staticmethod
+    def _add_to_stores(stores, records):
+        for data in records:
+            for store in stores:
+                store.add(data)
+        for store in stores:
+            store.touch()
+
+    def sketches(self, paths=None):
+        """
+        Gli sketch (quantili e valori distinti) di uno o più file di record.
+
+        Gli sketch di ogni file vengono calcolati una volta e salvati in
+        `<file>.sketches.json`; vengono ricalcolati solo se il file o il suo
+        registro delle modifiche sono cambiati. Gli sketch dei file vengono
+        poi uniti, con memoria limitata qualunque sia il numero di record.
+
+        Args:
+            paths: i file da considerare (default: il file attivo).
+
+        Returns:
+            FieldSketches: gli sketch uniti, per laboratorio.
+        """
+        merged = FieldSketches(self.fields)
+        for path in paths or [self.file]:
+            path = Path(path)
+            signature = file_signature(path, self._changelog(path).path)
+            cache = Path(str(path) + '.sketches.json')
+            sketches = FieldSketches.load(cache, signature)
+            if sketches is None:
+                sketches = FieldSketches(self.fields)
+                for record in self._read_records(path):
+                    sketches.add(record)
+                sketches.save(cache, signature)
+            merged.merge(sketches)
+        return merged
+
+    def load_batch(self, paths=None):
+        """
+        Carica uno o più file (default: quello attivo) in un `RecordBatch`,
+        la forma più compatta per tenere in memoria molti record.
+        """
+        batch = RecordBatch(self.fields, Record, self.encoder)
+        for path in paths or [self.file]:
+            batch.extend(iter_canonical_rows(
+                path, batch.names, self.key_fields, self.encoder
+            ))
+        return batch
+
+    def to_array(self, paths=None):
+        """
+        Carica uno o più file (default: quello attivo) in un array
+        strutturato NumPy; vedi `arrays.load_records`. Richiede NumPy.
+        """
+        return load_records(paths or [self.file], self.fields, self.key_fields)
+
+    def _files_for_day(self, day, lab=None):
+        """I file che possono contenere record della data indicata."""
+        files = {self.file}
+        home = self._home_file({'Date': day.isoformat()})
+        if home is not None:
+            files.add(home)
+        return [path for path in files if path.exists()]
+
+    def _files_for_range(self, start=None, end=None):
+        """I file che possono contenere record tra `start` ed `end`."""
+        return [path for path in self.archive_files(start, end) if path.exists()]
+
+    def rollup_series(self, field, lab=None, start=None, end=None, hourly=False):
+        """
+        L'andamento di un campo ambientale (Humidity, Light, Temperature)
+        letto dai riepiloghi orari o giornalieri, senza leggere i record.
+
+        Returns:
+            list: tuple (datetime, count, mean, min, max) ordinate nel tempo.
+        """
+        merged = dict()
+        with self._lock:
+            for path in self._files_for_range(start, end):
+                for when, stats in self.rollups(path).series(
+                        field, lab, start, end, hourly).items():
+                    merge_stats(merged, when, stats)
+        return [
+            (when, count, total / count, low, high)
+            for when, (count, total, low, high) in sorted(merged.items())
+        ]
+
+    def daily_summary(self, day=None, lab=None, plot=None):
+        """
+        Il riepilogo giornaliero (conteggio, somma, minimo, massimo e media
+        dei campi numerici), letto dagli aggregati senza scansionare i file.
+
+        Args:
+            day (date): la data (default: oggi).
+            lab, plot (str): filtri opzionali.
+        """
+        day = day or date.today()
+        with self._lock:
+            return AggregateStore.combine(
+                self.aggregates(path).summary(day.isoformat(), lab, plot)
+                for path in self._files_for_day(day, lab)
+            )
+
+    def record_pager(self):
+        """Un `RecordPager` sul file attivo, per sfogliarlo a pagine."""
+        path = self.file
+        return RecordPager(
+            path, self.fields.keys(), self.key_fields,
+            lambda: self.changelog_snapshot(path)
+        )
+
+    def changelog_snapshot(self, path=None):
+        """Una copia del registro delle modifiche di un file, presa sotto il lock."""
+        with self._lock:
+            return self._changelog(path).snapshot()[0]
+
+    def _compaction_files(self):
+        """I file che possono avere un registro delle modifiche da compattare."""
+        return [self.file]
+
+    def needs_compaction(self):
+        """True se un registro delle modifiche ha superato `compact_threshold` voci."""
+        with self._lock:
+            for path in self._compaction_files():
+                changelog = self._changelog(path)
+                changelog._load()
+                if changelog.entries >= self.compact_threshold:
+                    return True
+            return False
+
+    def compact(self, path=None):
+        """
+        Applica il registro delle modifiche al file principale e lo svuota.
+
+        Senza `path` vengono compattati tutti i file con modifiche registrate
+        (il file attivo o, per `PartitionedCSVModel`, ogni partizione).
+
+        Il file viene riscritto in un file temporaneo e poi sostituito con
+        `os.replace` (operazione atomica): un'interruzione non lascia mai un
+        file a metà. Riscrivere un file grande richiede tempo, quindi questo
+        metodo va chiamato da un thread separato.
+
+        Il lock viene tenuto solo per pochi istanti: all'inizio per fissare
+        la dimensione del file e una copia del registro, alla fine per
+        copiare in coda le righe salvate nel frattempo, sostituire il file e
+        lasciare nel registro solo le voci accodate durante la riscrittura.
+        Salvataggi e correzioni possono quindi continuare mentre il file
+        viene riscritto.
+        """
+        if path is None:
+            for path in self._compaction_files():
+                self.compact(path)
+            return
+        with self._lock:
+            changelog = self._changelog(path)
+            changelog._load()
+            if not changelog.entries or not path.exists():
+                return
+            src = open(path, 'rb')
+            size = os.fstat(src.fileno()).st_size
+            snapshot, changes_size = changelog.snapshot()
+
+        tmp = path.with_name(path.name + '.tmp')
+        with src, open(tmp, 'w', newline='', encoding=RECORD_ENCODING) as fh:
             csvwriter = csv.DictWriter(fh, fieldnames=self.fields.keys())
-            if newfile:
-                csvwriter.writeheader()
+            csvwriter.writeheader()
+            rows = csv.DictReader(_read_head(src, size))
+            csvwriter.writerows(snapshot.merge(rows, self.record_key))
+
+        with self._lock:
+            stores = self._summary_stores(path)
+            with open(path, 'rb') as src, open(tmp, 'ab') as fh:
+                src.seek(size)
+                shutil.copyfileobj(src, fh)
+            os.replace(tmp, path)
+            changelog.drop_head(changes_size)
+            self.archive.add(path, ())
+            # i record non sono cambiati: basta aggiornare la firma
+            for store in stores:
+                store.touch()
+                store.flush()
+
+
 
-            csvwriter.writerow(data)
\ No newline at end of file
+# la classe di record compatta (con __slots__) generata dallo schema
+Record = make_record_class(CSVModel.fields)
@@ -0,0 +1,211 @@
+"""
+        Monitor dei blocchi dell'interfaccia (event-loop stall monitor)
+"""
+
+import sys
+import threading
+import time
+import traceback
+import tkinter as tk
+from datetime import datetime
+from pathlib import Path
+
+# Tkinter avvolge ogni callback Python (validatecommand, trace, command dei
+# bottoni, bind, after...) in un oggetto `tkinter.CallWrapper`. Sostituendo
+# quella classe possiamo misurare la durata di *ogni* callback registrata
+# dopo l'installazione, senza toccare il codice dei widget.
+_OriginalCallWrapper = tk.CallWrapper
+_listeners = []
+
+
+class TimedCallWrapper(_OriginalCallWrapper):
+    """Un `CallWrapper` che notifica gli ascoltatori prima e dopo la callback."""
+
+    def __call__(self, *args):
+        if not _listeners:
+            return super().__call__(*args)
+        for listener in _listeners:
+            listener.callback_started(self)
+        start = time.perf_counter()
+        try:
+            return super().__call__(*args)
+        finally:
+            duration = time.perf_counter() - start
+            for listener in reversed(_listeners):
+                listener.callback_finished(self, duration)
+
+
+def add_callback_listener(listener):
+    """
+    Registra un ascoltatore delle callback di Tk.
+
+    L'ascoltatore deve implementare `callback_started(wrapper)` e
+    `callback_finished(wrapper, duration)`. Solo le callback registrate
+    *dopo* la prima chiamata a questa funzione vengono misurate.
+    """
+    tk.CallWrapper = TimedCallWrapper
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_callback_listener(listener):
+    """
+    Rimuove un ascoltatore registrato con `add_callback_listener`.
+
+    Quando non resta nessun ascoltatore viene ripristinato il `CallWrapper`
+    originale; le callback già registrate con quello misurato chiamano
+    direttamente la funzione, senza alcun costo.
+    """
+    if listener in _listeners:
+        _listeners.remove(listener)
+    if not _listeners:
+        tk.CallWrapper = _OriginalCallWrapper
+
+
+def _unwrap(func):
+    """Recupera la funzione originale dalle chiusure create da `after()`."""
+    code = getattr(func, '__code__', None)
+    if code is not None and 'func' in code.co_freevars and func.__closure__:
+        index = code.co_freevars.index('func')
+        return func.__closure__[index].cell_contents
+    return func
+
+
+def describe_callback(wrapper):
+    """Restituisce un nome leggibile per la callback, es. `Application._on_save @ .`"""
+    func = _unwrap(wrapper.func)
+    name = getattr(func, '__qualname__', None) or repr(func)
+    widget = getattr(wrapper, 'widget', None)
+    if widget is not None:
+        return f'{name} @ {widget}'
+    return name
+
+
+class StallMonitor:
+    """
+         SCOPO DELLA CLASSE `StallMonitor`:
+         =================================
+         Individua quali callback bloccano il ciclo degli eventi di Tkinter
+         ("l'interfaccia si congela") sulle postazioni di produzione.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Battito (heartbeat)**: con `after()` viene pianificato un battito
+             ogni `interval` millisecondi. Il ritardo tra l'istante previsto e
+             quello reale è il "lag" del mainloop.
+         2.  **Misura delle callback**: tramite `add_callback_listener` ogni
+             callback di Tk viene cronometrata; le statistiche (numero di
+             chiamate, tempo totale e massimo) sono raccolte per nome.
+         3.  **Campione dello stack**: un thread "watchdog" controlla la
+             callback in esecuzione; se supera la soglia ne cattura lo stack
+             con `sys._current_frames()`, così sappiamo *dove* era bloccata.
+         4.  **Log locale**: ogni blocco oltre la soglia viene accodato al file
+             `logfile` con la callback responsabile e lo stack campionato.
+    """
+
+    def __init__(self, root, logfile='abq_stalls.log', threshold=0.2, interval=100):
+        self.root = root
+        self.logfile = Path(logfile)
+        self.threshold = threshold
+        self.interval = interval
+        self.stats = dict()
+        self.max_lag = 0.0
+        self._running = []
+        self._lock = threading.Lock()
+        self._main_thread = threading.get_ident()
+        self._expected = None
+        self._job = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Avvia il battito, la misura delle callback e il watchdog."""
+        add_callback_listener(self)
+        self._stop.clear()
+        self._expected = time.perf_counter() + self.interval / 1000
+        self._job = self.root.after(self.interval, self._heartbeat)
+        self.root.bind('<Destroy>', self._on_destroy, add='+')
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def stop(self):
+        """Ferma il monitor e scrive il riepilogo delle callback più lente."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        remove_callback_listener(self)
+        if self._job is not None:
+            try:
+                self.root.after_cancel(self._job)
+            except tk.TclError:
+                pass
+            self._job = None
+        self._write(self._summary())
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.stop()
+
+    def _heartbeat(self):
+        """Misura il ritardo del battito rispetto all'istante previsto."""
+        now = time.perf_counter()
+        lag = now - self._expected
+        self.max_lag = max(self.max_lag, lag)
+        if lag > self.threshold:
+            self._write(f'mainloop lag {lag * 1000:.1f} ms')
+        self._expected = now + self.interval / 1000
+        self._job = self.root.after(self.interval, self._heartbeat)
+
+    def callback_started(self, wrapper):
+        with self._lock:
+            self._running.append([wrapper, time.perf_counter(), None])
+
+    def callback_finished(self, wrapper, duration):
+        with self._lock:
+            if not self._running:
+                return
+            _, _, stack = self._running.pop()
+        if _unwrap(wrapper.func) == self._heartbeat:
+            return
+        name = describe_callback(wrapper)
+        count, total, longest = self.stats.get(name, (0, 0.0, 0.0))
+        self.stats[name] = (count + 1, total + duration, max(longest, duration))
+        if duration > self.threshold:
+            message = f'slow callback {name}: {duration * 1000:.1f} ms'
+            if stack:
+                message += '\n' + ''.join(stack)
+            self._write(message)
+
+    def _watch(self):
+        """Thread watchdog: campiona lo stack delle callback troppo lunghe."""
+        while not self._stop.wait(self.threshold / 2):
+            with self._lock:
+                if not self._running:
+                    continue
+                entry = self._running[-1]
+                if entry[2] is not None:
+                    continue
+                if time.perf_counter() - entry[1] < self.threshold:
+                    continue
+                frame = sys._current_frames().get(self._main_thread)
+                if frame is not None:
+                    entry[2] = traceback.format_stack(frame)
+
+    def _summary(self, limit=10):
+        slowest = sorted(
+            self.stats.items(), key=lambda item: item[1][2], reverse=True
+        )[:limit]
+        lines = [f'session summary, max mainloop lag {self.max_lag * 1000:.1f} ms']
+        for name, (count, total, longest) in slowest:
+            lines.append(
+                f'  {name}: {count} calls, '
+                f'total {total * 1000:.1f} ms, max {longest * 1000:.1f} ms'
+            )
+        return '\n'.join(lines)
+
+    def _write(self, message):
+        timestamp = datetime.now().isoformat(timespec='milliseconds')
+        try:
+            with open(self.logfile, 'a') as fh:
+                fh.write(f'[{timestamp}] {message}\n')
+        except OSError:
+            # il monitor non deve mai far fallire l'applicazione
+            pass
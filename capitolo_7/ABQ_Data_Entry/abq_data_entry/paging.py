@@ -0,0 +1,188 @@
+"""
+        Lettura a pagine dei file di record (per la lista virtualizzata)
+"""
+
+import csv
+import io
+import os
+from collections import OrderedDict
+from .constants import RECORD_ENCODING
+from .csvio import iter_raw_records
+
+
+class RecordPager:
+    """
+         SCOPO DELLA CLASSE `RecordPager`:
+         ================================
+         Fornisce "pagine" di righe di un file CSV anche molto grande senza
+         mai caricarlo tutto in memoria: aprire la lista dei record deve
+         richiedere un tempo costante, qualunque sia la dimensione del file.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Indice sparso**: ogni `stride` righe viene memorizzato l'offset
+             in byte della riga. L'indice cresce solo quando si legge oltre
+             la parte già indicizzata; per leggere la riga N basta posizionarsi
+             sull'ultimo punto di controllo prima di N.
+         2.  **Stima del totale**: finché il file non è stato letto fino alla
+             fine, il numero di righe è stimato dalla dimensione del file e
+             dalla lunghezza media delle righe lette (basta la prima pagina).
+         3.  **Cache di pagine**: le ultime pagine lette restano in una cache
+             LRU, così i piccoli scorrimenti non rileggono il disco.
+         4.  **Registro delle modifiche**: le righe corrette vengono mostrate
+             con i nuovi valori, quelle cancellate sono segnalate come tali e
+             i record inseriti tramite il registro seguono in coda. Il pager
+             non legge mai il registro "vivo", che i salvataggi e la
+             compattazione modificano da altri thread: `changes()` gli
+             fornisce una copia (`ChangeLog.snapshot()`) presa sotto il lock
+             del modello, rinnovata a ogni `sync()`.
+         5.  **File sostituito**: se il file viene accorciato o sostituito
+             (es. dalla compattazione), indice e cache vengono azzerati.
+    """
+
+    def __init__(self, path, fields, key_fields, changes=None,
+                 stride=256, page_size=100, cached_pages=20):
+        self.path = path
+        self.fields = list(fields)
+        self.key_indexes = [self.fields.index(field) for field in key_fields]
+        self.changes = changes
+        self.changelog = None
+        self.stride = stride
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self._signature = None
+        self._reset()
+
+    def _reset(self):
+        self._checkpoints = []
+        self._scanned_rows = 0
+        self._scanned_bytes = 0
+        self._data_start = None
+        self._eof = False
+        self._pages = OrderedDict()
+
+    def _check_file(self):
+        """Azzera l'indice se il file è stato sostituito o accorciato."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            self._signature = None
+            return 0
+        if self._signature is not None:
+            inode, size = self._signature
+            if stat.st_ino != inode or stat.st_size < size:
+                self._reset()
+            elif stat.st_size > size:
+                # file cresciuto: le righe nuove sono in coda
+                self._eof = False
+                self._pages.pop(self._last_page(), None)
+        self._signature = (stat.st_ino, stat.st_size)
+        return stat.st_size
+
+    def sync(self):
+        """Prende una nuova copia del registro delle modifiche (a ogni aggiornamento della vista)."""
+        self.changelog = self.changes() if self.changes else None
+
+    def _changelog(self):
+        if self.changelog is None and self.changes:
+            self.sync()
+        return self.changelog
+
+    def _last_page(self):
+        return max(self._scanned_rows - 1, 0) // self.page_size
+
+    def count(self):
+        """Il numero di righe: esatto se il file è stato letto tutto, altrimenti stimato."""
+        size = self._check_file()
+        if not size:
+            return 0
+        if self._data_start is None:
+            self._read_rows(0, self.page_size)
+        changelog = self._changelog()
+        inserted = len(changelog.inserted()) if changelog else 0
+        if self._eof or not self._scanned_rows:
+            return self._scanned_rows + inserted
+        average = self._scanned_bytes / self._scanned_rows
+        remaining = size - self._data_start - self._scanned_bytes
+        return self._scanned_rows + max(0, round(remaining / average)) + inserted
+
+    def _read_rows(self, start, count):
+        """Legge le righe fisiche [start, start + count), estendendo l'indice."""
+        rows = []
+        with open(self.path, 'rb') as fh:
+            if self._data_start is None:
+                header = fh.readline()
+                self._data_start = len(header)
+                self._checkpoints = [self._data_start]
+            checkpoint = min(start // self.stride, len(self._checkpoints) - 1)
+            row = checkpoint * self.stride
+            raw = []
+            for offset, record in iter_raw_records(fh, self._checkpoints[checkpoint]):
+                if row % self.stride == 0 and row // self.stride == len(self._checkpoints):
+                    self._checkpoints.append(offset)
+                if row >= self._scanned_rows:
+                    self._scanned_rows = row + 1
+                    self._scanned_bytes = offset + len(record) - self._data_start
+                if row >= start:
+                    raw.append(record)
+                row += 1
+                if len(raw) == count:
+                    break
+            else:
+                self._eof = True
+        if raw:
+            text = b''.join(raw).decode(RECORD_ENCODING)
+            rows = list(csv.reader(io.StringIO(text, newline='')))
+        return rows
+
+    def _decorate(self, row):
+        """Applica il registro delle modifiche: (valori, stato)."""
+        changelog = self._changelog()
+        if changelog is None or len(row) <= max(self.key_indexes):
+            return row, ''
+        key = tuple(row[i] for i in self.key_indexes)
+        changed, record = changelog.resolve(key)
+        if not changed:
+            return row, ''
+        if record is None:
+            return row, 'deleted'
+        return [record.get(field, '') for field in self.fields], 'changed'
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is None:
+            page = self._read_rows(number * self.page_size, self.page_size)
+            self._pages[number] = page
+            if len(self._pages) > self.cached_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(number)
+        return page
+
+    def get(self, start, count):
+        """
+    Restituisce le righe [start, start + count) della vista.
+
+    Returns:
+        list: tuple (valori, stato) dove lo stato è '', 'changed' o 'deleted'.
+    """
+        self._check_file()
+        result = []
+        index = start
+        while len(result) < count:
+            number, position = divmod(index, self.page_size)
+            page = self._page(number)
+            if position >= len(page):
+                break
+            for row in page[position:position + count - len(result)]:
+                result.append(self._decorate(row))
+            index = start + len(result)
+        changelog = self._changelog()
+        if len(result) < count and self._eof and changelog:
+            physical = self._scanned_rows
+            inserted = changelog.inserted()
+            first = max(0, start + len(result) - physical)
+            for record in inserted[first:first + count - len(result)]:
+                result.append(([record.get(f, '') for f in self.fields], 'changed'))
+        return result
@@ -0,0 +1,346 @@
+"""
+        Archiviazione partizionata per periodo (e laboratorio)
+"""
+
+import csv
+import json
+import os
+from calendar import monthrange
+from datetime import date, timedelta
+from pathlib import Path
+from .changelog import INSERT
+from .constants import RECORD_ENCODING
+from .models import CSVModel, parse_record_date
+
+
+class PartitionScheme:
+    """
+    Decide in quale partizione (file) finisce un record.
+
+    Args:
+        period (str): 'day', 'week' (settimana ISO) o 'month'.
+        by_lab (bool): se True ogni laboratorio ha i suoi file.
+
+    Con `period='day'` e `by_lab=False` i nomi coincidono con quelli dei
+    file giornalieri di `CSVModel` (`abq_data_record_2023-10-27.csv`).
+    """
+
+    periods = ('day', 'week', 'month')
+    prefix = 'abq_data_record_'
+
+    def __init__(self, period='day', by_lab=False):
+        if period not in self.periods:
+            raise ValueError(f'Unknown partition period: {period}')
+        self.period = period
+        self.by_lab = by_lab
+
+    def period_key(self, day):
+        if self.period == 'day':
+            return day.isoformat()
+        if self.period == 'week':
+            year, week, _ = day.isocalendar()
+            return f'{year}-W{week:02d}'
+        return f'{day.year}-{day.month:02d}'
+
+    def bounds(self, key):
+        """Il primo e l'ultimo giorno del periodo indicato da una chiave."""
+        if self.period == 'day':
+            day = date.fromisoformat(key)
+            return day, day
+        if self.period == 'week':
+            year, week = key.split('-W')
+            first = date.fromisocalendar(int(year), int(week), 1)
+            return first, first + timedelta(days=6)
+        year, month = (int(x) for x in key.split('-'))
+        return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+    def filename(self, day, lab=None):
+        name = self.prefix + self.period_key(day)
+        if self.by_lab and lab:
+            name += f'_{lab}'
+        return name + '.csv'
+
+    def parse_filename(self, name):
+        """Ricava (chiave del periodo, laboratorio) dal nome di una partizione."""
+        stem = Path(name).stem[len(self.prefix):]
+        lab = None
+        if self.by_lab and '_' in stem:
+            stem, lab = stem.rsplit('_', 1)
+        return stem, lab
+
+
+class PartitionCatalog:
+    """
+    Il catalogo delle partizioni, salvato in `abq_catalog.json`.
+
+    Per ogni file registra data minima e massima, numero di righe e
+    dimensione in byte. Le query usano il catalogo per scartare le
+    partizioni che non possono contenere righe utili senza aprirle.
+    """
+
+    filename = 'abq_catalog.json'
+
+    def __init__(self, directory):
+        self.path = Path(directory) / self.filename
+        self.entries = dict()
+        if self.path.exists():
+            with open(self.path) as fh:
+                self.entries = json.load(fh)
+
+    def save(self):
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w') as fh:
+            json.dump(self.entries, fh, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def update(self, path, dates, rows, lab=None):
+        """Aggiorna la voce di una partizione dopo aver accodato `rows` righe."""
+        entry = self.entries.get(path.name)
+        dates = [d for d in dates if d]
+        if entry is None:
+            entry = {'min_date': None, 'max_date': None, 'rows': 0, 'lab': lab}
+            self.entries[path.name] = entry
+        if dates:
+            low, high = min(dates), max(dates)
+            entry['min_date'] = min(filter(None, (entry['min_date'], low)))
+            entry['max_date'] = max(filter(None, (entry['max_date'], high)))
+        entry['rows'] += rows
+        entry['bytes'] = path.stat().st_size
+
+    def refresh(self, path, lab=None):
+        """Ricalcola la voce di una partizione leggendone il contenuto."""
+        self.entries.pop(path.name, None)
+        dates = []
+        with open(path, newline='', encoding=RECORD_ENCODING) as fh:
+            for row in csv.DictReader(fh):
+                dates.append(row.get('Date') or '')
+        self.update(path, dates, len(dates), lab)
+
+    def is_stale(self, path):
+        entry = self.entries.get(path.name)
+        return entry is None or entry.get('bytes') != path.stat().st_size
+
+
+class PartitionedCSVModel(CSVModel):
+    """
+         SCOPO DELLA CLASSE `PartitionedCSVModel`:
+         ========================================
+         Un `CSVModel` che distribuisce i record in più file ("partizioni")
+         in base alla loro data e, opzionalmente, al laboratorio.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Partizione per data del record**: la partizione è scelta dal
+             campo `Date` del record, non dall'orologio al momento
+             dell'apertura: una sessione che supera la mezzanotte scrive
+             automaticamente nel file giusto.
+         2.  **Scritture economiche**: `save_records` raggruppa i record per
+             partizione e apre ogni file una sola volta per lotto.
+         3.  **Catalogo**: dopo ogni scrittura il catalogo (`PartitionCatalog`)
+             viene aggiornato con data minima/massima, righe e byte.
+         4.  **Potatura (pruning)**: `query(start, end, lab)` apre solo le
+             partizioni il cui intervallo di date interseca quello richiesto.
+         5.  **Correzioni**: `update_record`, `delete_record` e `compact`
+             agiscono sulla partizione che contiene il record (ognuna ha il
+             suo registro delle modifiche, applicato anche da `query`).
+    """
+
+    def __init__(self, directory='.', period='day', by_lab=False):
+        self.directory = Path(directory)
+        self.scheme = PartitionScheme(period, by_lab)
+        self._check_permissions(self.directory / self.scheme.filename(date.today()))
+        self.catalog = PartitionCatalog(self.directory)
+        self._daily_file = False
+        self.file = self.directory / self.scheme.filename(date.today())
+        self._init_indexes()
+
+    def partition_for(self, record):
+        """Il percorso della partizione che deve contenere `record`."""
+        day = parse_record_date(record.get('Date')) or date.today()
+        return self.directory / self.scheme.filename(day, record.get('Lab'))
+
+    def _target_file(self, data):
+        return self.partition_for(data)
+
+    def _home_file(self, data):
+        # ogni record viene scritto proprio nella partizione della sua data
+        return None
+
+    def _file_for_key(self, key):
+        return self.partition_for(dict(zip(self.key_fields, key)))
+
+    def _compaction_files(self):
+        suffix = '.changes'
+        return [
+            path.with_name(path.name[:-len(suffix)])
+            for path in sorted(self.directory.glob(self.scheme.prefix + '*.csv' + suffix))
+        ]
+
+    def update_record(self, key, data):
+        """
+        Corregge un record nella sua partizione. Se la correzione cambia la
+        partizione (Date o, con `by_lab`, Lab), il record viene cancellato
+        dalla vecchia e salvato nella nuova.
+        """
+        key = tuple(key)
+        with self._lock:
+            path = self._file_for_key(key)
+            if self.partition_for(data) == path:
+                return super().update_record(key, data)
+            if key not in self._keys_for(path):
+                raise KeyError(f'Record not found: {", ".join(key)}')
+            self._raise_on_duplicates([data])
+            self.delete_record(key)
+            self.save_records([data])
+
+    def _write_partition(self, path, rows, writer_factory, header, key, record):
+        """
+        Accoda le righe a una partizione. Come in `CSVModel.save_records`, una
+        riga con la chiave di un record cancellato va nel registro delle
+        modifiche della partizione (`insert`) invece che nel file.
+        """
+        changelog = self._changelog(path)
+        newfile = not path.exists()
+        with open(path, 'a', newline='', encoding=RECORD_ENCODING) as fh:
+            csvwriter = writer_factory(fh)
+            if newfile:
+                header(csvwriter)
+            for row in rows:
+                row_key = key(row)
+                if changelog.is_gone(row_key):
+                    changelog.append(INSERT, row_key, record(row))
+                else:
+                    csvwriter.writerow(row)
+
+    def save_records(self, records):
+        """Salva i record, ognuno nella sua partizione, aggiornando il catalogo."""
+        with self._lock:
+            records = list(records)
+            self._raise_on_duplicates(records)
+            groups = dict()
+            for data in records:
+                groups.setdefault(self.partition_for(data), []).append(data)
+            fieldnames = self.fields.keys()
+            for path, group in groups.items():
+                stores = self._summary_stores(path)
+                self._write_partition(
+                    path, group,
+                    lambda fh: csv.DictWriter(fh, fieldnames=fieldnames),
+                    lambda writer: writer.writeheader(),
+                    self.record_key, dict
+                )
+                self.catalog.update(
+                    path, [d.get('Date') for d in group], len(group),
+                    group[0].get('Lab') if self.scheme.by_lab else None
+                )
+                self._add_to_stores(stores, group)
+            if groups:
+                self.catalog.save()
+            self._index_records(records)
+        return len(records)
+
+    def save_rows(self, rows):
+        """Come `save_records`, per righe già nell'ordine di `fields`."""
+        names = list(self.fields.keys())
+        date_index, lab_index = names.index('Date'), names.index('Lab')
+        key_indexes = [names.index(field) for field in self.key_fields]
+
+        def row_key(row):
+            return tuple(row[i] for i in key_indexes)
+
+        def row_record(row):
+            return dict(zip(names, row))
+
+        with self._lock:
+            groups = dict()
+            for row in rows:
+                key = {'Date': row[date_index], 'Lab': row[lab_index]}
+                groups.setdefault(self.partition_for(key), []).append(row)
+            for path, group in groups.items():
+                stores = self._summary_stores(path)
+                self._write_partition(
+                    path, group, csv.writer,
+                    lambda writer: writer.writerow(names),
+                    row_key, row_record
+                )
+                self.catalog.update(
+                    path, [row[date_index] for row in group], len(group),
+                    group[0][lab_index] if self.scheme.by_lab else None
+                )
+                keys = [row_key(row) for row in group]
+                self._keys_for(path).update(keys)
+                self.archive.add(path, keys)
+                self._add_to_stores(stores, map(row_record, group))
+            if groups:
+                self.catalog.save()
+        return sum(len(group) for group in groups.values())
+
+    def _files_for_day(self, day, lab=None):
+        return self.partitions(day, day, lab)
+
+    def _files_for_range(self, start=None, end=None):
+        return self.partitions(start, end)
+
+    def partitions(self, start=None, end=None, lab=None):
+        """
+    Elenca le partizioni che possono contenere record nell'intervallo.
+
+    Args:
+        start, end (date): estremi inclusi dell'intervallo (None = aperto).
+        lab (str): se indicato, solo le partizioni di quel laboratorio
+            (quando lo schema è per laboratorio).
+    """
+        pattern = self.scheme.prefix + '*.csv'
+        selected = []
+        changed = False
+        for path in sorted(self.directory.glob(pattern)):
+            key, file_lab = self.scheme.parse_filename(path.name)
+            if lab and file_lab and file_lab != lab:
+                continue
+            try:
+                low, high = self.scheme.bounds(key)
+            except ValueError:
+                continue  # non è una partizione di questo schema
+            # prima potatura: i limiti del periodo ricavati dal nome del file
+            if (start and high < start) or (end and low > end):
+                continue
+            if self.catalog.is_stale(path):
+                self.catalog.refresh(path, file_lab)
+                changed = True
+            entry = self.catalog.entries[path.name]
+            # seconda potatura: le date effettive registrate nel catalogo
+            if entry['min_date'] is None:
+                continue
+            if (start and entry['max_date'] < start.isoformat()) or \
+                    (end and entry['min_date'] > end.isoformat()):
+                continue
+            selected.append(path)
+        if changed:
+            self.catalog.save()
+        return selected
+
+    def range_sketches(self, start=None, end=None, lab=None):
+        """
+    Gli sketch (vedi `CSVModel.sketches`) delle sole partizioni rilevanti,
+    per rispondere a domande come "mediana di Med Height per Lab nell'anno".
+
+    Gli sketch sono per partizione intera: una partizione che interseca solo
+    in parte l'intervallo viene considerata tutta.
+    """
+        return self.sketches(self.partitions(start, end, lab))
+
+    def query(self, start=None, end=None, lab=None):
+        """
+    Restituisce (in streaming) i record compresi tra `start` ed `end`.
+
+    Yields:
+        dict: i record delle sole partizioni rilevanti.
+    """
+        low = start.isoformat() if start else ''
+        high = end.isoformat() if end else '9999-12-31'
+        for path in self.partitions(start, end, lab):
+            # con il registro delle modifiche della partizione già applicato
+            for row in self._read_records(path):
+                if low <= (row.get('Date') or '') <= high and \
+                        (not lab or row.get('Lab') == lab):
+                    yield row
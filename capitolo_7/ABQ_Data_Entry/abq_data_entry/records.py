@@ -0,0 +1,291 @@
+"""
+        Tipi di record compatti: classi con __slots__ e lotti a colonne
+"""
+
+import keyword
+import math
+import re
+from array import array
+from datetime import date
+from .constants import FieldTypes as FT
+from .csvio import CategoryEncoder, iter_canonical_rows
+
+_TRUE_VALUES = frozenset(('true', '1', '1.0'))
+
+
+def attribute_name(field):
+    """Il nome dell'attributo Python di un campo (es. 'Seed Sample' -> 'seed_sample')."""
+    name = re.sub(r'\W+', '_', field.strip()).strip('_').lower()
+    if not name or name[0].isdigit() or keyword.iskeyword(name):
+        name = 'f_' + name
+    return name
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _TRUE_VALUES
+
+
+def _to_date(value):
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def _to_int(value):
+    if isinstance(value, int):
+        return value
+    return int(float(value))
+
+
+# FieldType -> funzione che converte il valore (stringa o già tipizzato)
+CONVERTERS = {
+    FT.decimal: float,
+    FT.integer: _to_int,
+    FT.boolean: _to_bool,
+    FT.iso_date_string: _to_date,
+}
+
+
+def make_record_class(fields, name='Record'):
+    """
+    Genera una classe di record con `__slots__` a partire dallo schema.
+
+    Ogni campo di `fields` diventa un attributo (`record.seed_sample`) con
+    il tipo Python del suo `FieldType`: `float` per i decimali, `int` per gli
+    interi, `bool` per i booleani, `date` per le date e `str` per i testi;
+    i valori mancanti sono `None`. Senza il `__dict__` di ogni istanza, un
+    record occupa una frazione della memoria di un dizionario.
+
+    Per compatibilità con il codice che usa i dizionari, la classe offre
+    anche `get(campo)`, `keys()` e `record[campo]` con i nomi dei campi,
+    quindi può essere passata direttamente a `CSVModel.save_records`.
+    """
+    field_names = tuple(fields.keys())
+    attributes = tuple(attribute_name(field) for field in field_names)
+    converters = tuple(
+        CONVERTERS.get(fields[field]['type'], str) for field in field_names
+    )
+    by_field = dict(zip(field_names, attributes))
+
+    def __init__(self, *values, **kwargs):
+        if len(values) > len(attributes):
+            raise TypeError(f'{name} takes at most {len(attributes)} values')
+        values = values + (None,) * (len(attributes) - len(values))
+        for attribute, convert, value in zip(attributes, converters, values):
+            value = kwargs.pop(attribute, value)
+            if value is not None and value != '':
+                value = convert(value)
+            else:
+                value = None
+            setattr(self, attribute, value)
+        if kwargs:
+            raise TypeError(f'Unknown fields: {", ".join(kwargs)}')
+
+    @classmethod
+    def from_dict(cls, data):
+        """Crea un record da un dizionario con i nomi dei campi."""
+        return cls(*(data.get(field) for field in field_names))
+
+    @classmethod
+    def from_row(cls, row):
+        """Crea un record da una riga CSV nell'ordine di `fields`."""
+        return cls(*row)
+
+    def to_dict(self):
+        return {
+            field: getattr(self, attribute)
+            for field, attribute in zip(field_names, attributes)
+        }
+
+    def get(self, field, default=None):
+        attribute = by_field.get(field)
+        if attribute is None:
+            return default
+        return getattr(self, attribute)
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, by_field[field])
+        except KeyError:
+            raise KeyError(field) from None
+
+    def keys(self):
+        return field_names
+
+    def __eq__(self, other):
+        if getattr(other, 'attributes', None) != attributes:
+            return NotImplemented
+        return all(
+            getattr(self, attribute) == getattr(other, attribute)
+            for attribute in attributes
+        )
+
+    def __repr__(self):
+        values = ', '.join(
+            f'{attribute}={getattr(self, attribute)!r}' for attribute in attributes
+        )
+        return f'{name}({values})'
+
+    namespace = {
+        '__slots__': attributes,
+        '__init__': __init__,
+        '__eq__': __eq__,
+        '__hash__': None,
+        '__repr__': __repr__,
+        '__getitem__': __getitem__,
+        'from_dict': from_dict,
+        'from_row': from_row,
+        'to_dict': to_dict,
+        'get': get,
+        'keys': keys,
+        'fields': field_names,
+        'attributes': attributes,
+    }
+    return type(name, (), namespace)
+
+
+class RecordBatch:
+    """
+         SCOPO DELLA CLASSE `RecordBatch`:
+         ================================
+         Un contenitore di molti record memorizzati "per colonna" invece che
+         come oggetti separati: è la forma più compatta per caricare in
+         memoria un intero archivio.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Colonne numeriche in `array`**: decimali in `array('d')` (NaN se
+             mancante), interi in `array('q')`, booleani in `array('b')`: 8 byte
+             (o 1) per valore invece di un oggetto Python per cella.
+         2.  **Colonne di categoria codificate**: le colonne di un
+             `CategoryEncoder` (per default i campi con `values` nello schema,
+             cioè Lab, Time e Plot) sono memorizzate come codici interi in
+             `array('i')`: i raggruppamenti (`group_by`) lavorano sugli interi.
+         3.  **Altre colonne**: date e testi restano liste di oggetti.
+         4.  **Compatibilità**: `batch[i]` restituisce un record della classe
+             generata da `make_record_class`; `to_dicts()` e `from_dicts()`
+             convertono da e verso i dizionari usati dal resto del codice.
+    """
+
+    missing_int = -(2 ** 63)
+
+    def __init__(self, fields, record_class=None, encoder=None):
+        self.fields = fields
+        self.names = tuple(fields.keys())
+        self.record_class = record_class or make_record_class(fields)
+        self.encoder = encoder or CategoryEncoder(fields)
+        self.dictionaries = self.encoder.dictionaries
+        self.columns = dict()
+        self._append = []
+        for key, spec in fields.items():
+            field_type = spec['type']
+            if key in self.dictionaries:
+                column = array('i')
+                encode = self._category_encoder(self.dictionaries[key])
+            elif field_type == FT.decimal:
+                column = array('d')
+                encode = lambda v: float(v) if v not in (None, '') else math.nan
+            elif field_type == FT.integer:
+                column = array('q')
+                encode = lambda v: _to_int(v) if v not in (None, '') else self.missing_int
+            elif field_type == FT.boolean:
+                column = array('b')
+                encode = lambda v: -1 if v in (None, '') else int(_to_bool(v))
+            else:
+                column = []
+                encode = lambda v: None if v in (None, '') else v
+            self.columns[key] = column
+            self._append.append((column.append, encode))
+
+    @staticmethod
+    def _category_encoder(dictionary):
+        code = dictionary.code
+
+        def encode(value):
+            if value is None or value == '':
+                return -1
+            return code(str(value))
+        return encode
+
+    def __len__(self):
+        return len(self.columns[self.names[0]])
+
+    def append(self, data):
+        """Aggiunge un record (dizionario, record generato o lista ordinata)."""
+        if isinstance(data, (list, tuple)):
+            values = data
+        else:
+            values = [data.get(key) for key in self.names]
+        for (append, encode), value in zip(self._append, values):
+            append(encode(value))
+
+    def extend(self, records):
+        for data in records:
+            self.append(data)
+
+    def value(self, key, index):
+        """Il valore (decodificato) del campo `key` del record `index`."""
+        raw = self.columns[key][index]
+        if key in self.dictionaries:
+            return self.dictionaries[key].values[raw] if raw >= 0 else None
+        field_type = self.fields[key]['type']
+        if field_type == FT.decimal:
+            return None if math.isnan(raw) else raw
+        if field_type == FT.integer:
+            return None if raw == self.missing_int else raw
+        if field_type == FT.boolean:
+            return None if raw < 0 else bool(raw)
+        return raw
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return self.record_class(*(self.value(key, index) for key in self.names))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def group_by(self, key):
+        """
+    Raggruppa gli indici dei record per valore di una colonna di categoria.
+
+    Il raggruppamento avviene sui codici interi; i valori vengono decodificati
+    solo alla fine, una volta per gruppo.
+
+    Returns:
+        dict: valore -> lista degli indici dei record.
+    """
+        groups = dict()
+        for index, code in enumerate(self.columns[key]):
+            groups.setdefault(code, []).append(index)
+        values = self.dictionaries[key].values
+        return {
+            (values[code] if code >= 0 else None): indexes
+            for code, indexes in groups.items()
+        }
+
+    def to_dicts(self):
+        """I record come dizionari (per `CSVModel.save_records` e simili)."""
+        for index in range(len(self)):
+            yield {key: self.value(key, index) for key in self.names}
+
+    @classmethod
+    def from_dicts(cls, fields, records):
+        batch = cls(fields)
+        batch.extend(records)
+        return batch
+
+    @classmethod
+    def from_csv(cls, fields, path, key_fields=(), record_class=None, encoder=None):
+        """
+    Carica un file CSV di record, associando le colonne per nome.
+
+    Se sono indicati i campi chiave, il registro delle modifiche del file
+    viene applicato (vedi `csvio.iter_canonical_rows`).
+    """
+        batch = cls(fields, record_class, encoder)
+        batch.extend(iter_canonical_rows(path, batch.names, key_fields, batch.encoder))
+        return batch
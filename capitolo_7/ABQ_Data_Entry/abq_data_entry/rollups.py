@@ -0,0 +1,116 @@
+"""
+        Riepiloghi orari e giornalieri dei dati ambientali in formato binario
+"""
+
+import struct
+from datetime import date, datetime, timedelta
+from .stores import SummaryStore, merge_stats
+
+# l'ora usata per le voci giornaliere
+DAY = 255
+
+
+class RollupStore(SummaryStore):
+    """
+         SCOPO DELLA CLASSE `RollupStore`:
+         ================================
+         Mantiene, per un file di record, conteggio, somma, minimo e massimo
+         di Humidity, Light e Temperature per (giorno, ora, Lab) e per
+         (giorno, Lab), così i grafici su lunghi periodi leggono poche voci
+         per giorno invece di tutte le righe.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Aggiornamento incrementale**: come per `AggregateStore`, il
+             modello aggiorna solo le voci dei record salvati, corretti o
+             cancellati (vedi `SummaryStore`).
+         2.  **Formato binario**: il file `<file>.rollups` contiene
+             un'intestazione (`header`: versione e firma del file di record
+             e del suo registro) seguita da voci di dimensione fissa
+             (`entry`, 50 byte): giorno come ordinale, ora (`DAY` per il
+             totale del giorno), Lab, campo, conteggio, somma, minimo e
+             massimo. Niente da analizzare: la
+             lettura è un `struct.iter_unpack` su tutto il file.
+         3.  **Ricostruzione**: come per gli aggregati, se la firma del file
+             di record non corrisponde i riepiloghi vengono ricalcolati (vedi
+             `SummaryStore`).
+    """
+
+    metrics = ('Humidity', 'Light', 'Temperature')
+    magic = b'ABQR'
+    version = 2
+    header = struct.Struct('<4sHQQQQ')
+    entry = struct.Struct('<IB16sBIddd')
+    suffix = '.rollups'
+
+    def _encode(self):
+        pack = self.entry.pack
+        chunks = [self.header.pack(self.magic, self.version, *self.signature)]
+        for (ordinal, hour, lab, field), stats in sorted(self.table.items()):
+            chunks.append(pack(ordinal, hour, lab.encode('utf-8'), field, *stats))
+        return b''.join(chunks)
+
+    def _decode(self, data, signature):
+        size = self.header.size
+        if len(data) < size or (len(data) - size) % self.entry.size:
+            return None
+        magic, version, *saved = self.header.unpack_from(data)
+        if magic != self.magic or version != self.version:
+            return None
+        if saved == signature:
+            table = dict()
+            for ordinal, hour, lab, field, count, total, low, high in \
+                    self.entry.iter_unpack(memoryview(data)[size:]):
+                key = (ordinal, hour, lab.rstrip(b'\0').decode('utf-8'), field)
+                table[key] = [count, total, low, high]
+            self.table = table
+        return saved
+
+    def _cells(self, record):
+        """Le voci di un record: la sua ora e il suo giorno, per ogni campo."""
+        try:
+            ordinal = date.fromisoformat(str(record.get('Date'))).toordinal()
+            hour = int(str(record.get('Time')).split(':')[0])
+        except ValueError:
+            return
+        if not 0 <= hour <= 23:
+            # l'ora occupa un byte e 255 è `DAY`: un Time sbagliato non deve
+            # confondersi con il giorno né far fallire `flush()`
+            return
+        lab = str(record.get('Lab') or '')
+        for index, field in enumerate(self.metrics):
+            value = self._number(record.get(field))
+            if value is not None:
+                yield (ordinal, hour, lab, index), value
+                yield (ordinal, DAY, lab, index), value
+
+    def series(self, field, lab=None, start=None, end=None, hourly=False):
+        """
+    I riepiloghi di un campo nel tempo.
+
+    Args:
+        field (str): Humidity, Light o Temperature.
+        lab (str): il laboratorio (None = tutti i laboratori insieme).
+        start, end (date): estremi inclusi (None = senza limite).
+        hourly (bool): una voce per ora invece che per giorno.
+
+    Returns:
+        dict: datetime (inizio dell'ora o del giorno) -> [count, sum, min, max].
+    """
+        index = self.metrics.index(field)
+        low = start.toordinal() if start else 0
+        high = end.toordinal() if end else date.max.toordinal()
+        merged = dict()
+        for (ordinal, hour, g_lab, g_field), stats in self.table.items():
+            if (
+                    g_field != index or (hour == DAY) == hourly or
+                    not low <= ordinal <= high or
+                    (lab is not None and g_lab != lab)
+            ):
+                continue
+            when = datetime.fromordinal(ordinal)
+            if hourly:
+                when += timedelta(hours=hour)
+            merge_stats(merged, when, stats)
+        return merged
+
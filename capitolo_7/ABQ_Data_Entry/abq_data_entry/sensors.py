@@ -0,0 +1,244 @@
+"""
+        Lettura in background dei sensori ambientali dei laboratori
+"""
+
+import math
+import os
+import random
+import socket
+import stat
+import threading
+import time
+
+# i campi della sezione Environment Data alimentati dai sensori
+SENSOR_FIELDS = ('Humidity', 'Light', 'Temperature', 'Equipment Fault')
+
+
+def parse_reading(line):
+    """
+    Analizza una lettura del flusso dei sensori.
+
+    Il protocollo è testuale, una lettura per riga: `Lab,campo,valore`
+    (es. `A,Temperature,21.4` oppure `C,Equipment Fault,1`).
+
+    Returns:
+        tuple: (lab, campo, valore) oppure None se la riga non è valida.
+    """
+    parts = line.strip().split(',')
+    if len(parts) != 3:
+        return None
+    lab, field, value = (part.strip() for part in parts)
+    if not lab or field not in SENSOR_FIELDS:
+        return None
+    try:
+        if field == 'Equipment Fault':
+            value = value.lower() in ('1', 'true')
+        else:
+            value = float(value)
+    except ValueError:
+        return None
+    return lab, field, value
+
+
+class SensorCache:
+    """
+    L'ultimo valore di ogni sensore, per laboratorio.
+
+    Viene scritta dal thread di lettura e letta dal thread di Tk: ogni
+    accesso è protetto da un lock e dura pochi microsecondi, quindi
+    l'interfaccia non aspetta mai il flusso dei sensori.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = dict()
+        self.readings = 0
+
+    def update_many(self, readings, when=None):
+        """Registra una serie di letture (lab, campo, valore) con un solo lock."""
+        when = when or time.time()
+        with self._lock:
+            for lab, field, value in readings:
+                self._values.setdefault(lab, dict())[field] = (value, when)
+                self.readings += 1
+
+    def update(self, lab, field, value, when=None):
+        self.update_many([(lab, field, value)], when)
+
+    def latest(self, lab, max_age=None):
+        """
+    Gli ultimi valori di un laboratorio.
+
+    Args:
+        max_age (float): scarta i valori più vecchi di questi secondi.
+
+    Returns:
+        dict: campo -> valore (solo i campi con una lettura valida).
+    """
+        limit = time.time() - max_age if max_age is not None else -math.inf
+        with self._lock:
+            values = dict(self._values.get(lab, ()))
+        return {
+            field: value for field, (value, when) in values.items()
+            if when >= limit
+        }
+
+
+class SensorReader(threading.Thread):
+    """
+         SCOPO DELLA CLASSE `SensorReader`:
+         =================================
+         Un thread (daemon) che legge il flusso dei sensori e aggiorna una
+         `SensorCache`, senza mai toccare Tk.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Sorgente**: `host:porta` (socket TCP), il percorso di un socket
+             Unix oppure di una FIFO creata con `mkfifo`.
+         2.  **Letture a blocchi**: i dati vengono letti a blocchi di
+             `chunk_size` byte, divisi in righe e registrati nella cache con
+             un solo lock per blocco: centinaia di letture al secondo costano
+             poche chiamate di sistema.
+         3.  **Riconnessione**: se la sorgente si chiude o non è disponibile,
+             il thread riprova dopo `retry` secondi finché non viene fermato
+             con `stop()`.
+    """
+
+    chunk_size = 65536
+    retry = 2.0
+
+    def __init__(self, source, cache=None):
+        super().__init__(name='SensorReader', daemon=True)
+        self.source = source
+        self.cache = cache or SensorCache()
+        self.connected = False
+        self.error = None
+        self._stopping = threading.Event()
+        self._stream = None
+
+    def stop(self):
+        self._stopping.set()
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def _open(self):
+        """Apre la sorgente e restituisce una funzione che legge un blocco."""
+        source = str(self.source)
+        if os.path.exists(source):
+            if stat.S_ISFIFO(os.stat(source).st_mode):
+                self._stream = open(source, 'rb', buffering=0)
+                return self._stream.read
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(source)
+        else:
+            host, _, port = source.rpartition(':')
+            sock = socket.create_connection((host or 'localhost', int(port)))
+        self._stream = sock
+        return sock.recv
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                read = self._open()
+                self.connected, self.error = True, None
+                self._consume(read)
+            except (OSError, ValueError) as e:
+                self.error = e
+            finally:
+                self.connected = False
+                if self._stream is not None:
+                    try:
+                        self._stream.close()
+                    except OSError:
+                        pass
+                    self._stream = None
+            self._stopping.wait(self.retry)
+
+    def _consume(self, read):
+        pending = b''
+        update = self.cache.update_many
+        while not self._stopping.is_set():
+            chunk = read(self.chunk_size)
+            if not chunk:
+                return  # sorgente chiusa
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            readings = []
+            for line in lines:
+                reading = parse_reading(line.decode('utf-8', 'replace'))
+                if reading is not None:
+                    readings.append(reading)
+            if readings:
+                update(readings)
+
+
+class SimulatedDevice(threading.Thread):
+    """
+    Un dispositivo simulato per le prove: un server TCP locale che invia
+    `rate` letture al secondo dei sensori di tutti i laboratori, con un
+    andamento giornaliero e un po' di rumore.
+
+    Uso::
+
+        device = SimulatedDevice(labs='ABCDE', rate=500)
+        device.start()
+        reader = SensorReader(device.address)
+    """
+
+    def __init__(self, labs='ABCDE', rate=200, host='127.0.0.1', port=0):
+        super().__init__(name='SimulatedDevice', daemon=True)
+        self.labs = list(labs)
+        self.rate = rate
+        self._server = socket.create_server((host, port))
+        self._stopping = threading.Event()
+        host, port = self._server.getsockname()[:2]
+        self.address = f'{host}:{port}'
+
+    def stop(self):
+        self._stopping.set()
+        self._server.close()
+
+    def reading(self, lab, field, now):
+        phase = (now % 86400) / 86400 * 2 * math.pi
+        offset = self.labs.index(lab)
+        if field == 'Humidity':
+            value = 10 + 5 * math.sin(phase + offset) + random.gauss(0, 0.2)
+        elif field == 'Light':
+            value = max(0.0, 50 * math.sin(phase - math.pi / 2) + random.gauss(0, 0.5))
+        elif field == 'Temperature':
+            value = 22 + 4 * math.sin(phase + offset / 2) + random.gauss(0, 0.1)
+        else:
+            return f'{lab},{field},{int(random.random() < 0.001)}'
+        return f'{lab},{field},{value:.2f}'
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        # le letture vengono inviate a gruppi, 20 volte al secondo
+        tick = 0.05
+        per_tick = max(1, round(self.rate * tick))
+        combos = [(lab, field) for lab in self.labs for field in SENSOR_FIELDS]
+        index = 0
+        with conn:
+            while not self._stopping.is_set():
+                now = time.time()
+                lines = []
+                for _ in range(per_tick):
+                    lab, field = combos[index % len(combos)]
+                    index += 1
+                    lines.append(self.reading(lab, field, now))
+                try:
+                    conn.sendall(('\n'.join(lines) + '\n').encode())
+                except OSError:
+                    return
+                time.sleep(tick)
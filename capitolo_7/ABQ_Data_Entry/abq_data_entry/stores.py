@@ -0,0 +1,231 @@
+"""
+        Riepiloghi ricostruibili salvati accanto ai file di record
+"""
+
+import os
+from pathlib import Path
+
+
+def file_signature(*paths):
+    """
+    La "firma" di uno o più file: dimensione e data di modifica (in ns) di
+    ognuno (0, 0 se manca).
+
+    I file di record e i loro registri delle modifiche crescono solo in
+    coda, quindi di solito cambia la dimensione; la data di modifica
+    rivela anche le modifiche fatte a mano che lasciano il file della
+    stessa dimensione.
+    """
+    signature = []
+    for path in map(Path, paths):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            signature.extend((0, 0))
+        else:
+            signature.extend((stat.st_size, stat.st_mtime_ns))
+    return signature
+
+
+def write_cache(path, data):
+    """
+    Scrive `data` (bytes) in `path` in modo atomico (file temporaneo e
+    `os.replace`).
+
+    I file scritti così sono tutti cache ricostruibili (riepiloghi, sketch,
+    indici): se la scrittura fallisce basta ricalcolarli alla prossima
+    apertura, quindi l'errore viene segnalato solo con il valore restituito.
+
+    Returns:
+        bool: True se il file è stato scritto.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    try:
+        with open(tmp, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        return False
+    return True
+
+
+def add_value(table, key, value):
+    """Aggiunge `value` alle statistiche [count, sum, min, max] di `table[key]`."""
+    stats = table.get(key)
+    if stats is None:
+        table[key] = [1, value, value, value]
+    else:
+        stats[0] += 1
+        stats[1] += value
+        if value < stats[2]:
+            stats[2] = value
+        if value > stats[3]:
+            stats[3] = value
+
+
+def merge_stats(table, key, stats):
+    """Somma le statistiche `stats` ([count, sum, min, max]) a `table[key]`."""
+    current = table.get(key)
+    if current is None:
+        table[key] = list(stats)
+    else:
+        current[0] += stats[0]
+        current[1] += stats[1]
+        current[2] = min(current[2], stats[2])
+        current[3] = max(current[3], stats[3])
+
+
+class SummaryStore:
+    """
+         SCOPO DELLA CLASSE `SummaryStore`:
+         =================================
+         La base dei riepiloghi calcolati dai record di un file e salvati in
+         `<file><suffix>` (`AggregateStore`, `RollupStore`): una tabella
+         chiave -> [count, sum, min, max].
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Firma**: il riepilogo viene salvato insieme alla firma
+             (`file_signature`) del file di record e del suo registro delle
+             modifiche; al caricamento una firma diversa significa che il
+             riepilogo non è più valido e va ricalcolato (`rebuild`).
+         2.  **Aggiornamenti incrementali**: `add(record)` e `remove(record)`
+             aggiornano solo le voci del record; dopo ogni scrittura il
+             modello chiama `touch()`, che registra la nuova firma in memoria.
+             Una correzione è un `remove` del vecchio record seguito da un
+             `add` del nuovo.
+         3.  **Minimi e massimi**: togliere un valore non permette di sapere
+             il nuovo minimo (o massimo) se il valore tolto era proprio
+             quello: la voce diventa "da ricalcolare" (`stale`) e viene
+             ricalcolata solo lei con `refresh(records)`, alla prima lettura.
+         4.  **Salvataggi differiti**: il file viene scritto da `flush()`
+             (periodicamente, alla compattazione e alla chiusura), non a ogni
+             record. Se il programma si interrompe prima, la firma salvata non
+             corrisponde e il riepilogo viene ricalcolato alla prossima
+             apertura.
+         5.  **Sottoclassi**: definiscono `suffix`, `_cells(record)` (le
+             coppie (chiave, valore) di un record), `_encode()` (i bytes da
+             salvare, firma compresa) e `_decode(data, signature)`, che
+             restituisce la firma salvata (None se il contenuto non è valido)
+             e ripristina la tabella solo se coincide con `signature`.
+    """
+
+    suffix = None
+
+    def __init__(self, data_file):
+        self.data_file = Path(data_file)
+        self.path = Path(str(data_file) + self.suffix)
+        self.changes_file = Path(str(data_file) + '.changes')
+        self.signature = None
+        self.table = dict()
+        self.stale = set()
+        self.dirty = False
+
+    def current_signature(self):
+        """Le dimensioni del file di record e del suo registro delle modifiche."""
+        return file_signature(self.data_file, self.changes_file)
+
+    def clear(self):
+        self.table = dict()
+        self.stale = set()
+
+    def load(self):
+        """
+    Carica il riepilogo salvato.
+
+    Returns:
+        bool: False se manca, è danneggiato o non corrisponde più al file
+        di record.
+    """
+        try:
+            data = self.path.read_bytes()
+        except OSError:
+            return False
+        current = self.current_signature()
+        if self._decode(data, current) != current:
+            self.clear()
+            return False
+        self.signature = current
+        self.dirty = False
+        return True
+
+    def touch(self):
+        """Registra la firma attuale dopo una scrittura già applicata al riepilogo."""
+        self.signature = self.current_signature()
+        self.dirty = True
+
+    def save(self):
+        """
+    Salva il riepilogo. Con voci da ricalcolare non viene scritto nulla: il
+    file salvato, con una firma vecchia, verrà semplicemente ricalcolato.
+    """
+        if self.stale or self.signature is None:
+            return False
+        if write_cache(self.path, self._encode()):
+            self.dirty = False
+            return True
+        return False
+
+    def flush(self):
+        """Salva il riepilogo se è cambiato dall'ultimo salvataggio."""
+        if self.dirty:
+            self.save()
+
+    def rebuild(self, records):
+        """Ricalcola tutto il riepilogo da una sequenza di record."""
+        self.clear()
+        for record in records:
+            self.add(record)
+        self.touch()
+        self.save()
+
+    def refresh(self, records):
+        """Ricalcola le sole voci `stale` da una sequenza di record."""
+        stale, self.stale = self.stale, set()
+        for key in stale:
+            self.table.pop(key, None)
+        for record in records:
+            for key, value in self._cells(record):
+                if key in stale:
+                    add_value(self.table, key, value)
+        self.dirty = True
+
+    def add(self, record):
+        """Aggiunge un record alle sue voci."""
+        table = self.table
+        for key, value in self._cells(record):
+            add_value(table, key, value)
+
+    def remove(self, record):
+        """Toglie un record (cancellato o corretto) dalle sue voci."""
+        for key, value in self._cells(record):
+            stats = self.table.get(key)
+            if stats is None:
+                continue
+            stats[0] -= 1
+            stats[1] -= value
+            if stats[0] <= 0:
+                del self.table[key]
+                self.stale.discard(key)
+            elif value <= stats[2] or value >= stats[3]:
+                self.stale.add(key)
+
+    @staticmethod
+    def _number(value):
+        """Il valore numerico di un campo, None se mancante o non valido."""
+        if value is None or value == '':
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _cells(self, record):
+        raise NotImplementedError
+
+    def _encode(self):
+        raise NotImplementedError
+
+    def _decode(self, data, signature):
+        raise NotImplementedError
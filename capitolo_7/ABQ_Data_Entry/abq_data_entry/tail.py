@@ -0,0 +1,140 @@
+"""
+        Lettura incrementale ("follow") dei file di record in crescita
+"""
+
+import csv
+import io
+import os
+from pathlib import Path
+from .constants import RECORD_ENCODING
+from .csvio import NEWLINE, record_boundary
+
+
+class TailReader:
+    """
+         SCOPO DELLA CLASSE `TailReader`:
+         ===============================
+         Segue un file di record mentre le stazioni vi accodano righe, come
+         `tail -f`: a ogni `poll()` legge e analizza solo i byte aggiunti
+         dall'ultima lettura, invece di rileggere tutto il file.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Offset dell'ultima riga completa**: il lettore ricorda la
+             posizione in byte subito dopo l'ultimo record completo letto.
+         2.  **Righe parziali**: se una stazione sta ancora scrivendo, la coda
+             del file può contenere un record a metà (anche un campo Notes tra
+             virgolette con degli a capo): `record_boundary` individua la fine
+             dell'ultimo record completo e il resto viene riletto al prossimo
+             `poll()`.
+         3.  **File sostituito**: se il file viene accorciato o sostituito
+             (es. dalla compattazione del registro delle modifiche), il
+             lettore ricomincia dall'inizio e `poll()` lo segnala, così chi
+             lo usa può scartare le righe ricevute in precedenza.
+         4.  **Correzioni**: le correzioni e le cancellazioni non cambiano il
+             file principale ma il suo registro `<file>.changes`, che è anche
+             lui un CSV "append-only" e si può seguire con un altro `TailReader`.
+    """
+
+    def __init__(self, path, encoder=None):
+        self.path = Path(path)
+        self.encoder = encoder
+        self.offset = 0
+        self.header = None
+        self._inode = None
+
+    def reset(self):
+        self.offset = 0
+        self.header = None
+        self._inode = None
+
+    def read_head(self):
+        """
+    Rilegge i record già restituiti da `poll()` (i primi `offset` byte del
+    file), per ricalcolare da capo ciò che ne è stato ricavato.
+    """
+        if not self.offset:
+            return []
+        with open(self.path, 'rb') as fh:
+            data = fh.read(self.offset)
+        text = data.decode(RECORD_ENCODING)
+        rows = csv.DictReader(io.StringIO(text, newline=''))
+        if self.encoder:
+            rows = self.encoder.intern_rows(rows)
+        return list(rows)
+
+    def poll(self):
+        """
+    Legge i record completi aggiunti dall'ultima chiamata.
+
+    Returns:
+        tuple: (lista dei nuovi record come dizionari, True se il file è
+        stato sostituito e la lettura è ricominciata dall'inizio)
+    """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return [], False
+        restarted = False
+        if self._inode is not None and (
+                stat.st_ino != self._inode or stat.st_size < self.offset):
+            self.reset()
+            restarted = True
+        self._inode = stat.st_ino
+        if stat.st_size == self.offset:
+            return [], restarted
+
+        with open(self.path, 'rb') as fh:
+            fh.seek(self.offset)
+            data = fh.read(stat.st_size - self.offset)
+        if self.header is None:
+            end = data.find(NEWLINE) + 1
+            if not end:
+                return [], restarted  # intestazione non ancora completa
+            self.header = next(csv.reader([data[:end].decode(RECORD_ENCODING)]))
+            self.offset += end
+            data = data[end:]
+        cut = record_boundary(data)
+        if not cut:
+            return [], restarted
+        self.offset += cut
+        text = data[:cut].decode(RECORD_ENCODING)
+        rows = csv.DictReader(io.StringIO(text, newline=''), fieldnames=self.header)
+        if self.encoder:
+            rows = self.encoder.intern_rows(rows)
+        return list(rows), restarted
+
+
+class DirectoryFollower:
+    """
+    Segue tutti i file di record di una cartella (es. la cartella condivisa
+    in cui salvano tutte le stazioni), con un `TailReader` per file.
+
+    A ogni `poll()` vengono cercati i file nuovi che corrispondono a
+    `pattern` (es. quelli di oggi) e letti solo i byte aggiunti.
+    """
+
+    def __init__(self, directory, pattern='abq_data_record_*.csv', encoder=None):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.encoder = encoder
+        self.readers = dict()
+
+    def poll(self):
+        """
+    Returns:
+        list: tuple (percorso, nuovi record, file sostituito) dei soli file
+        con novità.
+    """
+        for path in sorted(self.directory.glob(self.pattern)):
+            if path not in self.readers:
+                self.readers[path] = TailReader(path, self.encoder)
+        updates = []
+        for path, reader in list(self.readers.items()):
+            if not path.exists():
+                del self.readers[path]
+                continue
+            rows, restarted = reader.poll()
+            if rows or restarted:
+                updates.append((path, rows, restarted))
+        return updates
@@ -0,0 +1,224 @@
+"""
+        Contatore delle chiamate all'interprete Tcl (round-trip per azione)
+"""
+
+import functools
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from .monitor import add_callback_listener, remove_callback_listener, describe_callback
+
+# Metodi dell'interprete che costituiscono un round-trip Python -> Tcl.
+TRACED_METHODS = {
+    'call': None,
+    'eval': 'eval',
+    'getvar': 'var.get',
+    'setvar': 'var.set',
+    'globalgetvar': 'var.get',
+    'globalsetvar': 'var.set',
+    'createcommand': 'createcommand',
+    'deletecommand': 'deletecommand',
+}
+
+
+def _call_kind(args):
+    """
+    Classifica una `tk.call`: per i comandi dei widget (`.!frame.!entry cget ...`)
+    il tipo è il sottocomando (`cget`, `configure`, `insert`...), altrimenti
+    il comando Tcl stesso (`after`, `trace`, `bind`...).
+    """
+    if len(args) == 1 and isinstance(args[0], tuple):
+        args = args[0]
+    if not args:
+        return 'call'
+    command = str(args[0])
+    if command.startswith('.') and len(args) > 1:
+        return str(args[1])
+    return command
+
+
+class _TracedTkApp:
+    """Un proxy dell'interprete (`widget.tk`) che conta e cronometra le chiamate."""
+
+    def __init__(self, tkapp, tracer):
+        self._tkapp = tkapp
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        attr = getattr(self._tkapp, name)
+        if name not in TRACED_METHODS:
+            return attr
+        kind = TRACED_METHODS[name]
+        tracer = self._tracer
+
+        def traced(*args):
+            start = time.perf_counter()
+            try:
+                return attr(*args)
+            finally:
+                tracer.record(
+                    kind or _call_kind(args), time.perf_counter() - start
+                )
+        return traced
+
+
+class TclTracer:
+    """
+         SCOPO DELLA CLASSE `TclTracer`:
+         ==============================
+         Conta e cronometra ogni chiamata che attraversa l'interprete Tcl
+         (`tk.call`, `var.get`/`var.set`, `configure`, `cget`...) e la
+         attribuisce all'azione dell'utente che l'ha provocata.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Proxy dell'interprete**: `install(root)` sostituisce `root.tk`
+             con un proxy. Ogni widget e ogni variabile creati *dopo*
+             copiano il riferimento `master.tk`, quindi tutte le loro
+             chiamate passano dal proxy.
+         2.  **Azioni**: la callback di Tk più esterna in esecuzione (un tasto
+             in un campo, il bottone Save, il Reset...) definisce l'azione
+             corrente; il nome include l'etichetta del campo, se presente.
+             Con `action(name)` si può anche nominare un'azione esplicitamente.
+         3.  **Span sui metodi**: `trace_method(cls, name)` avvolge un metodo
+             (es. `DataRecordForm.get_errors`) così che le chiamate Tcl
+             eseguite al suo interno vengano contate anche sotto il suo nome.
+         4.  **Report di sessione**: `write_report(directory)` salva un file
+             JSON con, per ogni gruppo, il numero di invocazioni e i
+             round-trip per tipo, per confrontare le sessioni nel tempo.
+    """
+
+    def __init__(self):
+        self.groups = dict()
+        self._stack = []
+        self._callback_depth = 0
+        self._names = dict()
+        self._paused = False
+        self._patched = []
+        self.started = datetime.now()
+
+    def install(self, root):
+        """Installa il proxy sull'interprete di `root` e l'ascolto delle callback."""
+        root.tk = _TracedTkApp(root.tk, self)
+        add_callback_listener(self)
+
+    def uninstall(self):
+        """Rimuove l'ascolto delle callback e ripristina i metodi avvolti."""
+        remove_callback_listener(self)
+        for cls, name, original in self._patched:
+            setattr(cls, name, original)
+        self._patched.clear()
+
+    def _group(self, name):
+        return self.groups.setdefault(
+            name, {'invocations': 0, 'calls': 0, 'seconds': 0.0, 'kinds': {}}
+        )
+
+    def record(self, kind, duration):
+        """Registra una chiamata Tcl per tutti i gruppi attivi."""
+        if self._paused:
+            return
+        for name in (self._stack or ['(idle)']):
+            group = self._group(name)
+            group['calls'] += 1
+            group['seconds'] += duration
+            count, seconds = group['kinds'].get(kind, (0, 0.0))
+            group['kinds'][kind] = (count + 1, seconds + duration)
+
+    def _enter(self, name):
+        self._group(name)['invocations'] += 1
+        self._stack.append(name)
+
+    def _exit(self):
+        self._stack.pop()
+
+    @contextmanager
+    def action(self, name):
+        """Attribuisce esplicitamente le chiamate del blocco all'azione `name`."""
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def trace_method(self, cls, name):
+        """Avvolge `cls.name` per contare le chiamate Tcl eseguite al suo interno."""
+        original = getattr(cls, name)
+        label = f'{cls.__name__}.{name}'
+        tracer = self
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            with tracer.action(label):
+                return original(*args, **kwargs)
+
+        setattr(cls, name, wrapper)
+        self._patched.append((cls, name, original))
+
+    def _action_name(self, wrapper):
+        """Nome dell'azione per una callback, es. `ValidatedSpinbox._validate [Plants]`."""
+        key = id(wrapper)
+        if key not in self._names:
+            name = describe_callback(wrapper).split(' @ ')[0]
+            widget = getattr(wrapper, 'widget', None)
+            master = getattr(widget, 'master', None)
+            label = getattr(master, 'label', None)
+            if label is not None:
+                # la lettura dell'etichetta non deve finire nelle statistiche
+                self._paused = True
+                try:
+                    name = f"{name} [{label.cget('text')}]"
+                except Exception:
+                    pass
+                finally:
+                    self._paused = False
+            self._names[key] = name
+        return self._names[key]
+
+    def callback_started(self, wrapper):
+        self._callback_depth += 1
+        if self._callback_depth == 1:
+            self._enter(self._action_name(wrapper))
+
+    def callback_finished(self, wrapper, duration):
+        if self._callback_depth == 0:
+            return
+        self._callback_depth -= 1
+        if self._callback_depth == 0 and self._stack:
+            self._exit()
+
+    def report(self):
+        """Restituisce il report di sessione come dizionario."""
+        groups = dict()
+        for name, group in sorted(
+                self.groups.items(), key=lambda item: item[1]['calls'], reverse=True
+        ):
+            invocations = group['invocations'] or 1
+            groups[name] = {
+                'invocations': group['invocations'],
+                'calls': group['calls'],
+                'calls_per_invocation': round(group['calls'] / invocations, 1),
+                'ms': round(group['seconds'] * 1000, 3),
+                'kinds': {
+                    kind: {'calls': count, 'ms': round(seconds * 1000, 3)}
+                    for kind, (count, seconds) in sorted(
+                        group['kinds'].items(), key=lambda item: -item[1][0]
+                    )
+                },
+            }
+        return {
+            'session_start': self.started.isoformat(timespec='seconds'),
+            'session_end': datetime.now().isoformat(timespec='seconds'),
+            'groups': groups,
+        }
+
+    def write_report(self, directory='.'):
+        """Scrive il report in `abq_tcl_trace_<data-ora>.json` e ne restituisce il percorso."""
+        stamp = self.started.strftime('%Y%m%d-%H%M%S')
+        path = Path(directory) / f'abq_tcl_trace_{stamp}.json'
+        with open(path, 'w') as fh:
+            json.dump(self.report(), fh, indent=2)
+        return path
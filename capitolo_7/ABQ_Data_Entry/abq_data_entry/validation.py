@@ -0,0 +1,191 @@
+"""
+        Validazione dei record senza interfaccia grafica
+"""
+
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from .constants import FieldTypes as FT
+
+_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_TRUE_VALUES = {'true', '1', '1.0', 'yes', 'y', 'on'}
+_FALSE_VALUES = {'false', '0', '0.0', 'no', 'n', 'off', ''}
+
+
+class RecordValidator:
+    """
+         SCOPO DELLA CLASSE `RecordValidator`:
+         ====================================
+         Applica a un record (un dizionario di stringhe, come quelli letti da un
+         CSV) le stesse regole che i widget validati applicano nel form, ma
+         senza importare `tkinter`. Serve per l'importazione in blocco dei dati.
+
+         ARCHITETTURA E FUNZIONAMENTO:
+         -----------------------------
+         1.  **Regole dallo schema**: le regole vengono ricavate una sola volta da
+             `CSVModel.fields` (tipo, obbligatorietà, valori ammessi, min/max,
+             precisione) e "compilate" in una lista di controlli per campo, così
+             la validazione di ogni riga non deve reinterpretare lo schema.
+         2.  **Stessi messaggi del form**: gli errori usano gli stessi testi dei
+             widget (`'A value is required'`, `'Value is too low (min 0)'`...).
+         3.  **Campi disabilitati**: come nel form, se `Equipment Fault` è vero i
+             dati ambientali non sono obbligatori e vengono svuotati.
+         4.  **Normalizzazione**: `validate()` restituisce il record con i campi
+             nell'ordine canonico e i valori normalizzati (es. `'True'`/`'False'`
+             per i booleani), pronto per `CSVModel.save_record`.
+    """
+
+    fault_field = 'Equipment Fault'
+    fault_fields = ('Humidity', 'Light', 'Temperature')
+    height_fields = ('Min Height', 'Med Height', 'Max Height')
+
+    def __init__(self, fields):
+        self.fields = fields
+        self._checks = [
+            (key, self._compile(spec)) for key, spec in fields.items()
+        ]
+
+    def _compile(self, spec):
+        """Restituisce la funzione di controllo per una specifica di campo."""
+        field_type = spec.get('type', FT.string)
+        required = spec.get('req', False)
+
+        if field_type == FT.boolean:
+            return self._check_boolean
+        if field_type == FT.iso_date_string:
+            check = self._check_date
+        elif field_type in (FT.string_list, FT.short_string_list):
+            check = self._values_check(spec.get('values', []))
+        elif field_type == FT.decimal:
+            check = self._number_check(spec, Decimal)
+        elif field_type == FT.integer:
+            check = self._number_check(spec, int)
+        else:
+            check = None
+
+        def field_check(value):
+            if value == '':
+                if required:
+                    raise ValueError('A value is required')
+                return value
+            return check(value) if check else value
+        return field_check
+
+    @staticmethod
+    def _check_boolean(value):
+        lowered = value.strip().lower()
+        if lowered in _TRUE_VALUES:
+            return 'True'
+        if lowered in _FALSE_VALUES:
+            return 'False'
+        raise ValueError(f'Invalid boolean: {value}')
+
+    @staticmethod
+    def _check_date(value):
+        if not _ISO_DATE.match(value):
+            raise ValueError('Invalid date')
+        try:
+            date.fromisoformat(value)
+        except ValueError:
+            raise ValueError('Invalid date') from None
+        return value
+
+    @staticmethod
+    def _values_check(values):
+        allowed = frozenset(values)
+
+        def check(value):
+            if value not in allowed:
+                raise ValueError(f'Invalid value: {value}')
+            return value
+        return check
+
+    @staticmethod
+    def _number_check(spec, number_type):
+        min_val = spec.get('min')
+        max_val = spec.get('max')
+        increment = Decimal(str(spec.get('inc', '1')))
+        precision = increment.normalize().as_tuple().exponent
+
+        def check(value):
+            try:
+                number = Decimal(value)
+            except InvalidOperation:
+                raise ValueError(f'Invalid number string: {value}') from None
+            if not number.is_finite():
+                raise ValueError(f'Invalid number string: {value}')
+            if number_type is int and number != number.to_integral_value():
+                raise ValueError(f'Invalid number string: {value}')
+            if number.as_tuple().exponent < precision and number != number.quantize(
+                    Decimal(1).scaleb(precision)):
+                raise ValueError(f'Too many decimal places: {value}')
+            if min_val is not None and number < min_val:
+                raise ValueError(f'Value is too low (min {min_val})')
+            if max_val is not None and number > max_val:
+                raise ValueError(f'Value is too high (max {max_val})')
+            return value
+        return check
+
+    def check_header(self, columns):
+        """
+    Confronta le colonne di un file con lo schema.
+
+    Returns:
+        tuple: (campi obbligatori mancanti, colonne sconosciute)
+    """
+        columns = set(columns)
+        missing = [
+            key for key, spec in self.fields.items()
+            if spec.get('req') and key not in columns
+            and key not in self.fault_fields
+        ]
+        unknown = sorted(columns - set(self.fields))
+        return missing, unknown
+
+    def validate(self, row):
+        """
+    Valida un record e lo normalizza.
+
+    Args:
+        row (dict): valori del record; i valori non stringa (es. da JSON)
+            vengono convertiti in stringa, `None` diventa stringa vuota.
+
+    Returns:
+        tuple: (record normalizzato, dizionario degli errori). Il record è
+        `None` se ci sono errori.
+    """
+        record = dict()
+        errors = dict()
+        for key, check in self._checks:
+            value = row.get(key)
+            if value is None:
+                value = ''
+            elif not isinstance(value, str):
+                value = str(value)
+            else:
+                value = value.strip() if key != 'Notes' else value
+            try:
+                record[key] = check(value)
+            except ValueError as e:
+                errors[key] = str(e)
+
+        if record.get(self.fault_field) == 'True':
+            # come nel form: i campi ambientali sono disabilitati e svuotati
+            for key in self.fault_fields:
+                errors.pop(key, None)
+                record[key] = ''
+
+        if not any(key in errors for key in self.height_fields):
+            heights = [record.get(key) for key in self.height_fields]
+            if all(heights):
+                min_h, med_h, max_h = (Decimal(h) for h in heights)
+                if min_h > max_h:
+                    errors['Max Height'] = f'Value is too low (min {min_h})'
+                elif not min_h <= med_h <= max_h:
+                    errors['Med Height'] = (
+                        f'Value is out of range ({min_h} - {max_h})'
+                    )
+
+        if errors:
+            return None, errors
+        return record, errors
@@ -1,8 +1,15 @@
+import csv
+import io
 import tkinter as tk
 from tkinter import ttk
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from . import widgets as w
+from .charts import LineChartView
+from .changelog import ChangeLog
+from .dashboard import DashboardStats
+from .tail import DirectoryFollower
 from .constants import FieldTypes as FT
+from .validation import RecordValidator
 from tkinter.simpledialog import Dialog  # Serve per la generazione della finestra di Login
 
 
@@ -113,6 +120,9 @@ class DataRecordForm(tk.Frame):
             r_info, "Seed Sample",
             field_spec=fields['Seed Sample'],
             var=self._vars['Seed Sample'],
+            # i campioni si leggono con un lettore di codici a barre
+            input_class=w.BarcodeEntry,
+            input_args={'auto_advance': True},
         ).grid(row=1, column=2)
 
         # Environment Data
@@ -140,7 +150,12 @@ class DataRecordForm(tk.Frame):
             e_info, "Equipment Fault",
             field_spec=fields['Equipment Fault'],
             var=self._vars['Equipment Fault'],
-        ).grid(row=1, column=0, columnspan=3)
+        ).grid(row=1, column=0, columnspan=2)
+        # compila i campi con le ultime letture dei sensori del Lab
+        self.sensorbutton = ttk.Button(
+            e_info, text="Fill from Sensors",
+            command=lambda: self.event_generate('<<FillFromSensors>>'))
+        self.sensorbutton.grid(row=1, column=2)
 
         # Plant Data section
         p_info = self._add_frame("Plant Data")
@@ -206,6 +221,12 @@ class DataRecordForm(tk.Frame):
             buttons, text="Reset", command=self.reset)
         self.resetbutton.pack(side=tk.RIGHT)
 
+        # incolla più record copiati da un foglio di calcolo
+        self.pastebutton = ttk.Button(
+            buttons, text="Paste Rows",
+            command=lambda: self.event_generate('<<PasteRecords>>'))
+        self.pastebutton.pack(side=tk.LEFT)
+
         # default the form
         self.reset()
 
@@ -258,6 +279,23 @@ class DataRecordForm(tk.Frame):
                     raise e
         return data
 
+    def fill_environment(self, values):
+        """
+    Compila la sezione Environment Data con le letture dei sensori.
+
+    Args:
+        values (dict): campo -> valore (es. da `SensorCache.latest`); i campi
+            mancanti non vengono toccati. Con un guasto segnalato vengono
+            impostati solo `Equipment Fault` (i campi si disabilitano).
+    """
+        fault = bool(values.get('Equipment Fault'))
+        self._vars['Equipment Fault'].set(fault)
+        if fault:
+            return
+        for key in ('Humidity', 'Light', 'Temperature'):
+            if values.get(key) is not None:
+                self._vars[key].set(round(values[key], 2))
+
     def reset(self):
         """
     Resetta il form a uno stato predefinito, implementando una logica "intelligente".
@@ -324,6 +362,714 @@ class DataRecordForm(tk.Frame):
         return errors
 
 
+class RecordList(tk.Frame):
+    """
+  Una lista dei record del file attivo, "virtualizzata".
+
+  Un `ttk.Treeview` con decine di migliaia di righe richiede secondi per
+  essere riempito e molta memoria. Questa Vista invece crea soltanto le
+  righe visibili (`height`) e, quando l'utente scorre, ne sostituisce i
+  valori con quelli della nuova posizione, letti a pagine dal modello
+  tramite un `RecordPager`.
+
+  ARCHITETTURA E FUNZIONAMENTO:
+  - **Righe fisse**: il Treeview contiene sempre `height` elementi; scorrere
+    significa solo aggiornarne i valori (`item(..., values=...)`).
+  - **Scrollbar "virtuale"**: la `ttk.Scrollbar` non è collegata al Treeview
+    ma a `_on_scroll`, che traduce la posizione nel numero della prima riga
+    da mostrare rispetto al totale (stimato) dei record.
+  - **Stato delle righe**: i record corretti o cancellati tramite il registro
+    delle modifiche vengono evidenziati con dei tag.
+  """
+
+    def __init__(self, parent, model, *args, height=20, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.model = model
+        self.height = height
+        self._pager = None
+        self._pager_file = None
+        self._top = 0
+        self._total = 0
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        columns = list(self.model.fields.keys())
+        self.treeview = ttk.Treeview(
+            self, columns=columns, show='headings',
+            height=height, selectmode='browse'
+        )
+        for column in columns:
+            self.treeview.heading(column, text=column)
+            self.treeview.column(column, width=80, stretch=True)
+        self.treeview.tag_configure('changed', foreground='blue')
+        self.treeview.tag_configure('deleted', foreground='grey')
+        self.treeview.grid(row=0, column=0, sticky='nsew')
+
+        self.scrollbar = ttk.Scrollbar(
+            self, orient=tk.VERTICAL, command=self._on_scroll
+        )
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+
+        # le uniche righe che verranno mai create
+        self._items = [
+            self.treeview.insert('', tk.END, values=()) for _ in range(height)
+        ]
+
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.treeview.bind(sequence, self._on_wheel)
+        self.treeview.bind('<Prior>', lambda _: self._on_scroll(tk.SCROLL, -1, 'pages'))
+        self.treeview.bind('<Next>', lambda _: self._on_scroll(tk.SCROLL, 1, 'pages'))
+
+    def refresh(self):
+        """
+    Ricarica le righe visibili dal modello.
+
+    Se il modello ha cambiato file (es. con `File > Select`), viene creato
+    un nuovo `RecordPager`. Il costo è proporzionale alle sole righe visibili.
+    """
+        if self._pager is None or self._pager_file != self.model.file:
+            self._pager = self.model.record_pager()
+            self._pager_file = self.model.file
+            self._top = 0
+        self._pager.sync()
+        self._total = self._pager.count()
+        self._top = max(0, min(self._top, self._total - self.height))
+        rows = self._pager.get(self._top, self.height)
+        if len(rows) < self.height and self._top:
+            # la stima del totale era in eccesso: ora il totale è esatto
+            self._total = self._pager.count()
+            self._top = max(0, self._total - self.height)
+            rows = self._pager.get(self._top, self.height)
+
+        for position, iid in enumerate(self._items):
+            if position < len(rows):
+                values, state = rows[position]
+                self.treeview.item(iid, values=values, tags=(state,) if state else ())
+            else:
+                self.treeview.item(iid, values=(), tags=())
+
+        total = max(self._total, 1)
+        self.scrollbar.set(
+            self._top / total, min(1.0, (self._top + self.height) / total)
+        )
+
+    def _on_scroll(self, action, amount, unit=None):
+        """Gestisce i comandi della scrollbar (`moveto` e `scroll`)."""
+        if action == tk.MOVETO:
+            self._top = int(float(amount) * self._total)
+        elif action == tk.SCROLL:
+            step = self.height if unit == 'pages' else 1
+            self._top += int(amount) * step
+        self.refresh()
+
+    def _on_wheel(self, event):
+        """Scorre di tre righe con la rotellina del mouse."""
+        if event.num == 4 or event.delta > 0:
+            self._on_scroll(tk.SCROLL, -3, 'units')
+        else:
+            self._on_scroll(tk.SCROLL, 3, 'units')
+        return 'break'
+
+
+class GridEntryForm(tk.Frame):
+    """
+  Una Vista per inserire in una sola tabella tutti i Plot di un Lab.
+
+  Nel `DataRecordForm` i tecnici inseriscono un Plot alla volta e ogni
+  salvataggio ricostruisce e resetta l'intero form; nei controlli delle
+  8:00 o delle 12:00 questo significa 20 salvataggi (e 20 aperture del
+  file) per laboratorio. Qui i dati comuni (Date, Time, Technician, Lab)
+  si inseriscono una volta sola e ogni riga della tabella è un Plot.
+
+  ARCHITETTURA E FUNZIONAMENTO:
+  - **Celle leggere**: le celle sono semplici `tk.Entry` (e `ttk.Checkbutton`
+    per `Equipment Fault`) senza validazione a ogni tasto: con 20 righe i
+    widget validati del form sarebbero centinaia di callback.
+  - **Validazione in blocco**: al salvataggio ogni riga viene validata con
+    `RecordValidator`, cioè con le stesse regole e gli stessi messaggi di
+    `CSVModel.fields`; le celle con errori vengono evidenziate.
+  - **Un solo salvataggio**: la Vista genera `<<SaveRecords>>`; il Controllore
+    legge i record con `get_records()` e li scrive con `save_records`, cioè
+    con un'unica scrittura su file.
+  - **Righe vuote**: le righe lasciate completamente vuote vengono ignorate,
+    così si può salvare anche solo una parte dei Plot.
+  """
+
+    shared_fields = ('Date', 'Time', 'Technician', 'Lab')
+    plot_field = 'Plot'
+    error_background = 'misty rose'
+
+    def __init__(self, parent, model, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.model = model
+        fields = self.model.fields
+        self.validator = RecordValidator(fields)
+        self.plots = fields[self.plot_field]['values']
+        self.columns = [
+            key for key in fields
+            if key not in self.shared_fields and key != self.plot_field
+        ]
+        self.columnconfigure(0, weight=1)
+
+        # dati comuni a tutte le righe, con i widget validati del form
+        self._vars = {key: tk.StringVar() for key in self.shared_fields}
+        r_info = ttk.LabelFrame(self, text="Record Information")
+        r_info.grid(sticky=tk.W + tk.E)
+        for column, key in enumerate(self.shared_fields):
+            r_info.columnconfigure(column, weight=1)
+            w.LabelInput(
+                r_info, key, field_spec=fields[key], var=self._vars[key]
+            ).grid(row=0, column=column)
+
+        # la tabella: una riga per Plot
+        table = ttk.LabelFrame(self, text="Plots")
+        table.grid(sticky=tk.W + tk.E)
+        ttk.Label(table, text=self.plot_field).grid(row=0, column=0)
+        for column, key in enumerate(self.columns, start=1):
+            ttk.Label(table, text=key).grid(row=0, column=column)
+        self._cells = list()
+        for row, plot in enumerate(self.plots, start=1):
+            ttk.Label(table, text=plot).grid(row=row, column=0)
+            cells = dict()
+            for column, key in enumerate(self.columns, start=1):
+                if fields[key]['type'] == FT.boolean:
+                    var = tk.BooleanVar(value=False)
+                    widget = ttk.Checkbutton(table, variable=var)
+                else:
+                    var = tk.StringVar()
+                    width = 30 if fields[key]['type'] == FT.long_string else 8
+                    widget = tk.Entry(table, textvariable=var, width=width)
+                    widget.bind('<Return>', self._move_focus)
+                    widget.bind('<Down>', self._move_focus)
+                    widget.bind('<Up>', self._move_focus)
+                    widget.bind('<<Paste>>', self._on_paste)
+                widget.grid(row=row, column=column, sticky=tk.W + tk.E)
+                cells[key] = (var, widget)
+            fault = cells.get(self.validator.fault_field)
+            if fault:
+                fault[0].trace_add(
+                    'write', lambda *_, c=cells: self._check_fault(c)
+                )
+            self._cells.append(cells)
+        self._default_background = self._cells[0][self.columns[0]][1].cget('background')
+
+        # buttons
+        buttons = tk.Frame(self)
+        buttons.grid(sticky=tk.W + tk.E)
+        self.savebutton = ttk.Button(
+            buttons, text="Save All", command=self._on_save)
+        self.savebutton.pack(side=tk.RIGHT)
+        self.resetbutton = ttk.Button(
+            buttons, text="Reset", command=self.reset)
+        self.resetbutton.pack(side=tk.RIGHT)
+
+        self.reset()
+
+    def _move_focus(self, event):
+        """Invio e freccia giù passano alla stessa colonna della riga successiva."""
+        step = -1 if event.keysym == 'Up' else 1
+        for row, cells in enumerate(self._cells):
+            for key, (_, widget) in cells.items():
+                if widget is event.widget:
+                    target = self._cells[(row + step) % len(self._cells)][key][1]
+                    target.focus()
+                    target.select_range(0, tk.END)
+                    return 'break'
+
+    def _find_cell(self, widget):
+        for row, cells in enumerate(self._cells):
+            for column, key in enumerate(self.columns):
+                if cells[key][1] is widget:
+                    return row, column
+        return None
+
+    def _on_paste(self, event):
+        """
+    Incolla un blocco di celle copiato da un foglio di calcolo.
+
+    Se gli appunti contengono tabulazioni o più righe, i valori riempiono
+    la tabella a partire dalla cella corrente, come in un foglio di
+    calcolo; altrimenti si lascia all'Entry il normale comportamento.
+    La validazione avviene come sempre al salvataggio.
+    """
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            return None
+        if '\t' not in text and '\n' not in text.rstrip('\r\n'):
+            return None
+        start = self._find_cell(event.widget)
+        if start is None:
+            return None
+        first_row, first_column = start
+        lines = list(csv.reader(io.StringIO(text, newline=''), delimiter='\t'))
+        for row, cells in enumerate(lines, start=first_row):
+            if row >= len(self._cells):
+                break
+            for column, value in enumerate(cells, start=first_column):
+                if column >= len(self.columns):
+                    break
+                var, widget = self._cells[row][self.columns[column]]
+                if str(widget.cget('state')) == tk.DISABLED:
+                    continue
+                if isinstance(var, tk.BooleanVar):
+                    var.set(value.strip().lower() in ('1', '1.0', 'true', 'yes'))
+                else:
+                    var.set(value.strip())
+        return 'break'
+
+    def _check_fault(self, cells):
+        """Come nel form: con `Equipment Fault` i dati ambientali sono disabilitati."""
+        fault = cells[self.validator.fault_field][0].get()
+        for key in self.validator.fault_fields:
+            var, widget = cells[key]
+            if fault:
+                var.set('')
+            widget.configure(state=tk.DISABLED if fault else tk.NORMAL)
+
+    def _on_save(self):
+        """Chiede al Controllore di salvare tutte le righe (vedi `DataRecordForm._on_save`)."""
+        self.event_generate('<<SaveRecords>>')
+
+    def _row_values(self, cells):
+        values = dict()
+        for key, (var, _) in cells.items():
+            value = var.get()
+            values[key] = str(value) if isinstance(value, bool) else value
+        return values
+
+    @staticmethod
+    def _is_blank(values):
+        return not any(v for v in values.values() if v not in ('', 'False'))
+
+    def get_records(self):
+        """
+    Valida tutte le righe compilate e restituisce i record pronti da salvare.
+
+    Returns:
+        tuple: (lista dei record, dizionario degli errori). Gli errori hanno
+        come chiave il nome del campo comune, oppure `'Plot N'` per le righe,
+        e come valore un dizionario campo -> messaggio.
+    """
+        shared = {key: var.get() for key, var in self._vars.items()}
+        records = list()
+        errors = dict()
+        for plot, cells in zip(self.plots, self._cells):
+            for _, widget in cells.values():
+                if isinstance(widget, tk.Entry):
+                    widget.configure(background=self._default_background)
+            values = self._row_values(cells)
+            if self._is_blank(values):
+                continue
+            values.update(shared)
+            values[self.plot_field] = plot
+            record, row_errors = self.validator.validate(values)
+            for key, message in row_errors.items():
+                if key in cells:
+                    cells[key][1].configure(background=self.error_background)
+                    errors.setdefault(f'{self.plot_field} {plot}', {})[key] = message
+                else:
+                    errors.setdefault(key, {})[key] = message
+            if record:
+                records.append(record)
+        if not records and not errors:
+            errors['Plots'] = {'Plots': 'No plot has been filled in'}
+        return records, errors
+
+    def reset(self):
+        """
+    Svuota la tabella, mantenendo Technician e Lab (come il reset del form
+    quando si passa al gruppo di Plot successivo) e impostando la data corrente.
+    """
+        for cells in self._cells:
+            for var, widget in cells.values():
+                var.set(False if isinstance(var, tk.BooleanVar) else '')
+                if isinstance(widget, tk.Entry):
+                    widget.configure(background=self._default_background)
+        self._vars['Date'].set(datetime.today().strftime('%Y-%m-%d'))
+        self._vars['Time'].set('')
+        self._vars['Time'].label_widget.input.focus()
+
+
+class PastePreviewDialog(Dialog):
+    """
+  Anteprima dei record incollati dagli appunti, prima del salvataggio.
+
+  Mostra in una tabella ogni riga incollata con il suo esito (OK o gli
+  errori di validazione/duplicato). Confermando, il Controllore salva in
+  un unico lotto solo le righe valide; `result` è True se l'utente conferma.
+  """
+
+    def __init__(self, parent, title, checked, fields):
+        self.checked = checked
+        self.fields = list(fields)
+        self.valid = sum(1 for _, _, record, _ in checked if record)
+        super().__init__(parent, title=title)
+
+    def body(self, frame):
+        ttk.Label(
+            frame,
+            text=(
+                f'{len(self.checked)} rows pasted: {self.valid} valid, '
+                f'{len(self.checked) - self.valid} with errors'
+            )
+        ).grid(row=0, column=0, sticky=tk.W)
+        columns = ['Line', 'Status', *self.fields]
+        tree = ttk.Treeview(frame, columns=columns, show='headings', height=15)
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=200 if column == 'Status' else 70)
+        tree.tag_configure('error', foreground='red')
+        for line, row, record, errors in self.checked:
+            status = 'OK' if record else '; '.join(
+                f'{key}: {message}' for key, message in errors.items()
+            )
+            source = record or row
+            tree.insert(
+                '', tk.END,
+                values=[line, status, *(source.get(f, '') for f in self.fields)],
+                tags=() if record else ('error',)
+            )
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.grid(row=1, column=0, sticky='nsew')
+        scrollbar.grid(row=1, column=1, sticky='ns')
+        return tree
+
+    def buttonbox(self):
+        box = ttk.Frame(self)
+        save = ttk.Button(
+            box, text=f'Save {self.valid} valid rows', command=self.ok,
+            default=tk.ACTIVE)
+        save.grid(padx=5, pady=5)
+        if not self.valid:
+            save.state(['disabled'])
+        ttk.Button(
+            box, text='Cancel', command=self.cancel).grid(row=0, column=1, padx=5, pady=5)
+        self.bind('<Escape>', self.cancel)
+        box.pack()
+
+    def apply(self):
+        self.result = True
+
+
+class SupervisorDashboard(tk.Toplevel):
+    """
+  Il cruscotto "dal vivo" dei supervisori, in una finestra separata.
+
+  Mostra i record per ora di ogni tecnico, il completamento dei Plot per
+  ogni Lab e slot orario e i guasti per Lab, leggendo i file di record di
+  oggi di tutte le stazioni (la cartella del file attivo).
+
+  ARCHITETTURA E FUNZIONAMENTO:
+  - **Letture incrementali**: un `DirectoryFollower` legge a ogni giro solo
+    le righe aggiunte dall'ultima volta; le statistiche (`DashboardStats`)
+    vengono aggiornate con le sole righe nuove, una per file.
+  - **Cadenza fissa**: il controllo avviene ogni `interval` millisecondi con
+    `after()`, e le tabelle vengono ridisegnate solo se è arrivato qualcosa
+    o è cambiata l'ora: il cruscotto può restare aperto tutto il giorno.
+  - **Record per ora**: contano solo i record arrivati a cruscotto aperto;
+    quelli letti all'apertura e quelli riletti quando un file viene
+    compattato (sostituito) contano solo nel totale del giorno.
+  - **Correzioni e cancellazioni**: anche i registri delle modifiche
+    (`<file>.changes`) vengono seguiti. Quando un registro cambia, le
+    statistiche del suo file vengono ricalcolate da capo con le modifiche
+    applicate (i file giornalieri sono piccoli e le correzioni rare); le
+    righe nuove passano comunque per il registro già letto. I record per
+    ora restano un conteggio degli arrivi e non vengono corretti.
+  - **Cambio di giorno**: a mezzanotte il cruscotto passa ai file del
+    nuovo giorno e riparte da zero.
+  """
+
+    def __init__(self, parent, model, *args, interval=5000, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.title('Supervisor Dashboard')
+        self.model = model
+        self.interval = interval
+        self.labs = model.fields['Lab']['values']
+        self.times = model.fields['Time']['values']
+        self.plot_count = len(model.fields['Plot']['values'])
+        self._day = None
+        self._hour = None
+        self._loading = True
+        self._follower = None
+        self._changes = None
+        self._changelogs = dict()
+        self._stats = dict()
+        self._job = None
+        self.columnconfigure(0, weight=1)
+
+        hours = ttk.LabelFrame(self, text='Records per technician')
+        hours.grid(sticky='nsew', padx=10, pady=5)
+        self.technicians = ttk.Treeview(
+            hours, columns=('This hour', 'Last hour', 'Today'), height=8
+        )
+        self.technicians.heading('#0', text='Technician')
+        for column in ('This hour', 'Last hour', 'Today'):
+            self.technicians.heading(column, text=column)
+            self.technicians.column(column, width=80, anchor=tk.E)
+        self.technicians.pack(fill=tk.BOTH, expand=True)
+
+        labs = ttk.LabelFrame(self, text='Plots completed per Lab and Time')
+        labs.grid(sticky='nsew', padx=10, pady=5)
+        columns = (*self.times, 'Faults')
+        self.completion = ttk.Treeview(
+            labs, columns=columns, height=len(self.labs)
+        )
+        self.completion.heading('#0', text='Lab')
+        self.completion.column('#0', width=60)
+        for column in columns:
+            self.completion.heading(column, text=column)
+            self.completion.column(column, width=70, anchor=tk.CENTER)
+        for lab in self.labs:
+            self.completion.insert('', tk.END, iid=lab, text=lab)
+        self.completion.tag_configure('complete', foreground='dark green')
+        self.completion.pack(fill=tk.BOTH, expand=True)
+
+        self.updated = tk.StringVar()
+        ttk.Label(self, textvariable=self.updated).grid(sticky=tk.W, padx=10)
+
+        self.bind('<Destroy>', self._on_destroy)
+        self._poll()
+
+    def _check_day(self):
+        today = date.today().isoformat()
+        if today != self._day:
+            self._day = today
+            self._loading = True
+            self._stats.clear()
+            self._changelogs.clear()
+            self._follower = DirectoryFollower(
+                self.model.file.parent,
+                f'abq_data_record_{today}*.csv',
+                self.model.encoder
+            )
+            self._changes = DirectoryFollower(
+                self.model.file.parent, f'abq_data_record_{today}*.csv.changes'
+            )
+            return True
+        return False
+
+    def _poll(self):
+        """Legge le righe nuove e aggiorna le tabelle se qualcosa è cambiato."""
+        changed = self._check_day()
+        recount = dict()
+        for path, rows, restarted in self._follower.poll():
+            if path in self._stats and not restarted:
+                self._stats[path].add(self._resolve(path, rows))
+            else:
+                # file nuovo o sostituito: viene ricontato da capo, e le sue
+                # righe arrivano ora solo se il file è comparso a cruscotto aperto
+                arrived = not (self._loading or restarted)
+                recount[path] = rows if arrived else ()
+            changed = True
+        for changes, _, _ in self._changes.poll():
+            data_file = changes.with_name(changes.name[:-len('.changes')])
+            recount.setdefault(data_file, ())
+            changed = True
+        for path, arrived in recount.items():
+            self._recount(path, arrived)
+        self._loading = False
+        hour = datetime.now().hour
+        if hour != self._hour:
+            self._hour = hour
+            changed = True
+        if changed:
+            self._refresh()
+        self._job = self.after(self.interval, self._poll)
+
+    def _resolve(self, path, rows):
+        """Applica alle righe nuove di un file il suo registro delle modifiche."""
+        changelog = self._changelogs.get(path)
+        if changelog is None:
+            return rows
+        resolved = []
+        for row in rows:
+            changed, record = changelog.resolve(self.model.record_key(row))
+            if not changed:
+                resolved.append(row)
+            elif record is not None:
+                resolved.append(record)
+        return resolved
+
+    def _recount(self, path, arrived=()):
+        """
+        Ricalcola le statistiche di un file dai record già letti, con il
+        registro delle modifiche applicato. Gli arrivi per ora già contati
+        restano; `arrived` sono le righe appena arrivate da aggiungervi.
+        """
+        previous = self._stats.get(path)
+        changelog = ChangeLog(path, self.model.fields, self.model.key_fields)
+        self._changelogs[path] = changelog
+        reader = self._follower.readers.get(path)
+        rows = reader.read_head() if reader else []
+        stats = self._stats[path] = DashboardStats()
+        if previous is not None:
+            stats.per_hour = previous.per_hour
+        stats.add(changelog.merge(rows, self.model.record_key), arrived=False)
+        stats.add_arrivals(arrived)
+
+    def _refresh(self):
+        stats = DashboardStats()
+        for file_stats in self._stats.values():
+            stats.merge(file_stats)
+
+        self.technicians.delete(*self.technicians.get_children())
+        for technician, values in sorted(stats.technicians().items()):
+            self.technicians.insert('', tk.END, text=technician, values=values)
+
+        for lab in self.labs:
+            done = [len(stats.plots.get((lab, time), ())) for time in self.times]
+            self.completion.item(
+                lab,
+                values=[f'{count}/{self.plot_count}' for count in done]
+                + [stats.faults.get(lab, 0)],
+                tags=('complete',) if all(
+                    count >= self.plot_count for count in done) else ()
+            )
+        self.updated.set(
+            f'{stats.records} records today - updated '
+            f'{datetime.now().strftime("%H:%M:%S")}'
+        )
+
+    def _on_destroy(self, event):
+        if event.widget is self and self._job:
+            self.after_cancel(self._job)
+            self._job = None
+
+
+class TrendView(tk.Frame):
+    """
+  Una Vista con l'andamento nel tempo dei dati ambientali.
+
+  Si sceglie il campo (Humidity, Light, Temperature), il Lab, il Plot (o
+  tutti i Plot, una linea per Plot) e il periodo; premendo `Show` i dati
+  vengono disegnati da un `LineChartView`, che decima ogni serie a poche
+  centinaia di punti qualunque sia il numero di record.
+
+  Solo i periodi brevi (fino a `raw_days` giorni) leggono i record; per i
+  periodi più lunghi vengono letti i riepiloghi orari o giornalieri del
+  modello (media, minimo e massimo del Lab), senza toccare i file di record.
+
+  `Show` genera l'evento `<<ShowTrends>>`: il Controllore legge i parametri
+  con `request()`, esegue `load()` (che usa solo il modello) in un thread
+  di lavoro e disegna il risultato con `show()` nel thread di Tk.
+  """
+
+    chart_fields = ('Humidity', 'Light', 'Temperature')
+    # periodo -> giorni (None = tutto l'archivio)
+    ranges = {
+        'Last 7 days': 7, 'Last 30 days': 30, 'Last 90 days': 90,
+        'Last year': 365, 'All': None,
+    }
+    raw_days = 7
+    hourly_days = 30
+
+    def __init__(self, parent, model, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.model = model
+        self.field = tk.StringVar(value=self.chart_fields[0])
+        self.lab = tk.StringVar(value=model.fields['Lab']['values'][0])
+        self.plot = tk.StringVar(value='All')
+        self.range = tk.StringVar(value='Last 7 days')
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        controls = ttk.Frame(self)
+        controls.grid(sticky=tk.W + tk.E, pady=5)
+        for label, var, values in (
+                ('Field', self.field, self.chart_fields),
+                ('Lab', self.lab, model.fields['Lab']['values']),
+                ('Plot', self.plot, ['All', *model.fields['Plot']['values']]),
+                ('Range', self.range, self.ranges),
+        ):
+            ttk.Label(controls, text=label).pack(side=tk.LEFT, padx=(10, 2))
+            ttk.Combobox(
+                controls, textvariable=var, values=list(values),
+                state='readonly', width=12
+            ).pack(side=tk.LEFT)
+        ttk.Button(controls, text='Show', command=self.refresh).pack(
+            side=tk.LEFT, padx=10)
+
+        self.chart = LineChartView(
+            self, x_label='Date', x_format=self.format_timestamp
+        )
+        self.chart.grid(sticky='nsew')
+
+    @staticmethod
+    def record_timestamp(record):
+        """L'istante di un record (Date e slot Time) in secondi, None se non valido."""
+        try:
+            return datetime.strptime(
+                f"{record.get('Date')} {record.get('Time')}", '%Y-%m-%d %H:%M'
+            ).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def format_timestamp(value):
+        return datetime.fromtimestamp(value).strftime('%Y-%m-%d')
+
+    def load_series(self, field, lab, plot='All', start=None):
+        """Le serie (una per Plot) di un campo e di un Lab, dai record."""
+        series = dict()
+        for record in self.model.query(start=start, lab=lab):
+            if plot != 'All' and record.get('Plot') != plot:
+                continue
+            when = self.record_timestamp(record)
+            try:
+                value = float(record.get(field))
+            except (TypeError, ValueError):
+                continue  # campo vuoto o non numerico
+            if when is None:
+                continue
+            series.setdefault(f"Plot {record.get('Plot')}", []).append(
+                (when, value)
+            )
+        for points in series.values():
+            points.sort()
+        return series
+
+    def load_rollups(self, field, lab, start=None, hourly=False):
+        """Le serie media, minimo e massimo del Lab, dai riepiloghi."""
+        rows = self.model.rollup_series(field, lab, start=start, hourly=hourly)
+        series = {'Mean': [], 'Min': [], 'Max': []}
+        for when, _, mean, low, high in rows:
+            x = when.timestamp()
+            series['Mean'].append((x, mean))
+            series['Min'].append((x, low))
+            series['Max'].append((x, high))
+        return series
+
+    def request(self):
+        """I parametri scelti nei controlli, per `load()`."""
+        days = self.ranges[self.range.get()]
+        return {
+            'field': self.field.get(),
+            'lab': self.lab.get(),
+            'plot': self.plot.get(),
+            'days': days,
+        }
+
+    def load(self, field, lab, plot, days):
+        """
+    Le serie da disegnare. Non tocca i widget: si può eseguire in un thread
+    di lavoro.
+    """
+        start = date.today() - timedelta(days=days - 1) if days else None
+        if days is not None and days <= self.raw_days:
+            return self.load_series(field, lab, plot, start)
+        hourly = days is not None and days <= self.hourly_days
+        return self.load_rollups(field, lab, start, hourly)
+
+    def show(self, series, field):
+        self.chart.set_series(series, y_label=field)
+
+    def refresh(self):
+        self.event_generate('<<ShowTrends>>')
+
+
 """
   08/02/2026 - Finestra di Login - simpledialog
   Una finestra di Login che chiede nome ustente e password
@@ -273,6 +273,111 @@ class RequiredEntry(ValidatedMixin, ttk.Entry):
         return valid
 
 
+class BurstMixin:
+    """
+  Un "Mixin" che riconosce le raffiche di tasti dei lettori di codici a barre.
+
+  I lettori "keyboard-wedge" simulano una tastiera e inviano 20 o più
+  caratteri in pochi millisecondi: con la validazione a ogni tasto di
+  `ValidatedMixin` ogni carattere costa una chiamata a `_validate`, e sulle
+  stazioni lente i caratteri possono arrivare in ritardo o andare persi.
+
+  ARCHITETTURA E FUNZIONAMENTO:
+  -----------------------------
+  1.  **Riconoscimento**: un tasto che arriva entro `burst_interval` ms dal
+      precedente (secondo il tempo dell'evento) appartiene a una raffica.
+      Il primo carattere viene inserito normalmente; i successivi vengono
+      trattenuti (il binding restituisce 'break', quindi niente
+      inserimento e niente validazione).
+  2.  **Validazione unica**: quando la raffica finisce (nessun tasto per
+      `2 * burst_interval` ms, un tasto lento, oppure Invio/Tab inviati dal
+      lettore come terminatore) il testo trattenuto viene inserito con un
+      solo `insert()`: una sola validazione per tutta la raffica.
+  3.  **Avanzamento automatico**: con `auto_advance=True` il focus passa al
+      campo successivo (e la validazione "focus-out" controlla il codice
+      intero) dopo una lettura chiusa da Invio/Tab, oppure di almeno
+      `min_burst` caratteri non tutti uguali: un tasto tenuto premuto
+      (ripetizione automatica della tastiera) produce anch'esso una
+      raffica, ma di un solo carattere, e non deve spostare il focus.
+      Viene anche generato l'evento virtuale `<<BarcodeScanned>>`.
+  4.  **Tasto dopo l'avanzamento**: se la raffica viene chiusa da un tasto
+      lento e il focus è passato al campo successivo, quel tasto viene
+      scartato invece di finire nel campo appena lasciato.
+
+  La digitazione normale non cambia: i tasti di una persona sono molto più
+  distanti di `burst_interval`.
+  """
+
+    burst_interval = 30  # ms
+
+    def __init__(self, *args, auto_advance=False, min_burst=8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.auto_advance = auto_advance
+        self.min_burst = min_burst
+        self._burst = []
+        self._last_key = None
+        self._flush_job = None
+        self.bind('<KeyPress>', self._on_burst_key, add='+')
+
+    def _on_burst_key(self, event):
+        rapid = (
+            self._last_key is not None and
+            0 <= event.time - self._last_key <= self.burst_interval
+        )
+        self._last_key = event.time
+        if self.instate(['disabled']):
+            return None
+        if event.keysym in ('Return', 'KP_Enter', 'Tab') and self._burst:
+            # il terminatore inviato dal lettore alla fine del codice
+            self._flush_burst(terminated=True)
+            return 'break'
+        if not rapid or not event.char or not event.char.isprintable():
+            # digitazione normale (o primo carattere di una raffica)
+            if self._flush_burst():
+                return 'break'  # il focus è già sul campo successivo
+            return None
+        self._burst.append(event.char)
+        if self._flush_job is not None:
+            self.after_cancel(self._flush_job)
+        self._flush_job = self.after(self.burst_interval * 2, self._flush_burst)
+        return 'break'
+
+    def _flush_burst(self, terminated=False):
+        """
+        Inserisce i caratteri trattenuti con un'unica validazione.
+
+        Returns:
+            bool: True se il focus è passato al campo successivo.
+        """
+        if self._flush_job is not None:
+            self.after_cancel(self._flush_job)
+            self._flush_job = None
+        if not self._burst:
+            return False
+        text, self._burst = ''.join(self._burst), []
+        if self.selection_present():
+            self.delete(tk.SEL_FIRST, tk.SEL_LAST)
+        self.insert(tk.INSERT, text)
+        self.event_generate('<<BarcodeScanned>>')
+        if not self.auto_advance:
+            return False
+        # +1: il primo carattere della raffica è stato inserito normalmente
+        scanned = terminated or (
+            len(text) + 1 >= self.min_burst and len(set(text)) > 1
+        )
+        if scanned:
+            self.tk_focusNext().focus_set()
+        return scanned
+
+
+class BarcodeEntry(BurstMixin, RequiredEntry):
+    """
+  Un `RequiredEntry` per i codici letti con un lettore di codici a barre
+  (es. Seed Sample): le raffiche del lettore vengono validate una sola
+  volta (vedi `BurstMixin`).
+  """
+
+
 class ValidatedCombobox(ValidatedMixin, ttk.Combobox):
     """
   Un widget ttk.Combobox con validazione e autocompletamento.
@@ -530,28 +635,78 @@ class BoundText(tk.Text):
     """
   Un widget tk.Text con una variabile collegata (two-way data binding).
   Mantiene il contenuto del widget e la `textvariable` sempre sincronizzati.
+
+  SINCRONIZZAZIONE DIFFERITA:
+  Copiare tutto il testo nella variabile a ogni tasto premuto rende la
+  digitazione lenta quando le note sono lunghe. Per questo la variabile
+  viene aggiornata solo:
+  -   dopo `sync_delay` millisecondi dalla prima modifica (debounce);
+  -   quando il widget perde il focus;
+  -   quando qualcuno legge la variabile (trace 'read'), così chi chiama
+      `var.get()` riceve sempre il contenuto aggiornato.
+  Il flag `_syncing` evita l'"eco": la scrittura della variabile fatta dal
+  widget non deve ricaricare il contenuto nel widget stesso.
   """
 
-    def __init__(self, *args, textvariable=None, **kwargs):
+    def __init__(self, *args, textvariable=None, sync_delay=300, **kwargs):
         super().__init__(*args, **kwargs)
         self._variable = textvariable
+        self._sync_delay = sync_delay
+        self._sync_job = None
+        self._syncing = False
         if self._variable:
             # insert any default value
             self.insert('1.0', self._variable.get())
+            self.edit_modified(False)
             self._variable.trace_add('write', self._set_content)
-            self.bind('<<Modified>>', self._set_var)
+            self._variable.trace_add('read', self._set_var)
+            self.bind('<<Modified>>', self._schedule_sync)
+            self.bind('<FocusOut>', self._set_var, add='+')
+
+    def _schedule_sync(self, *_):
+        """
+    Pianifica l'aggiornamento della variabile dopo `sync_delay` ms.
+
+    `<<Modified>>` viene generato solo quando il flag "modified" passa da
+    falso a vero: finché la variabile non viene sincronizzata, i tasti
+    successivi non generano altri eventi e non costano nulla.
+    """
+        if self.edit_modified() and self._sync_job is None:
+            self._sync_job = self.after(self._sync_delay, self._set_var)
 
     def _set_var(self, *_):
-        """Aggiorna la variabile quando l'utente scrive nel widget."""
-        if self.edit_modified():
+        """Aggiorna la variabile con il contenuto del widget, se modificato."""
+        if self._sync_job is not None:
+            self.after_cancel(self._sync_job)
+            self._sync_job = None
+        if self._syncing or not self.edit_modified():
+            return
+        self._syncing = True
+        try:
             content = self.get('1.0', 'end-1chars')
             self._variable.set(content)
             self.edit_modified(False)
+        finally:
+            self._syncing = False
 
     def _set_content(self, *_):
         """Aggiorna il widget quando la variabile viene modificata programmaticamente."""
-        self.delete('1.0', tk.END)
-        self.insert('1.0', self._variable.get())
+        if self._syncing:
+            return
+        self._syncing = True
+        try:
+            # il valore impostato dal programma ha la precedenza
+            # su eventuali modifiche non ancora sincronizzate
+            if self._sync_job is not None:
+                self.after_cancel(self._sync_job)
+                self._sync_job = None
+            value = self._variable.get()
+            if value != self.get('1.0', 'end-1chars'):
+                self.delete('1.0', tk.END)
+                self.insert('1.0', value)
+            self.edit_modified(False)
+        finally:
+            self._syncing = False
 
 
 ###########################
@@ -0,0 +1,95 @@
+"""
+Punto di Ingresso per l'Importazione in Blocco (senza interfaccia grafica)
+
+Questo script importa nel formato ABQ i record prodotti da altre fonti
+(es. i logger portatili), senza aprire la finestra dell'applicazione e
+senza importare `tkinter`: può quindi girare anche su un server.
+
+ANALISI TECNICA:
+1.  Legge uno o più file CSV o JSON-lines in streaming.
+2.  Valida ogni riga con le stesse regole del form (`CSVModel.fields`).
+3.  Scrive i record validi tramite `CSVModel`, a lotti.
+4.  Riporta le righe scartate con il motivo (opzione `--rejects`).
+5.  Con `--workers N` analisi e validazione vengono distribuite su N
+    processi; la scrittura resta nell'ordine dei file di ingresso.
+6.  Con `--legacy` riscrive nello schema attuale i file salvati dalle
+    versioni precedenti dell'applicazione (intestazioni variabili).
+7.  Con `--partition day|week|month` (ed eventualmente `--by-lab`) i record
+    vengono distribuiti in partizioni temporali con un catalogo.
+
+Utilizzo::
+
+    python3 abq_ingest.py logger1.csv logger2.jsonl --output abq_data_record.csv
+"""
+import argparse
+import sys
+
+from abq_data_entry.models import CSVModel
+from abq_data_entry.ingest import ingest
+from abq_data_entry.legacy import LegacyNormalizer
+from abq_data_entry.partitions import PartitionScheme, PartitionedCSVModel
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Import ABQ records from CSV or JSON-lines files.'
+    )
+    parser.add_argument('inputs', nargs='+', help='CSV or JSON-lines files to import')
+    parser.add_argument(
+        '-o', '--output',
+        help="target CSV file (default: today's abq_data_record file)"
+    )
+    parser.add_argument('-r', '--rejects', help='CSV file listing the rejected rows')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument(
+        '-j', '--workers', type=int, default=1,
+        help='number of processes used to parse and validate the input'
+    )
+    parser.add_argument(
+        '--legacy', action='store_true',
+        help='rewrite record files of older app versions into the current '
+             'schema, without validation'
+    )
+    parser.add_argument(
+        '--partition', choices=PartitionScheme.periods,
+        help='write into time partitions of the --directory folder '
+             'instead of a single file'
+    )
+    parser.add_argument('--by-lab', action='store_true', help='one partition per Lab')
+    parser.add_argument('--directory', default='.', help='partitions folder')
+    args = parser.parse_args(argv)
+
+    if args.partition:
+        model = PartitionedCSVModel(args.directory, args.partition, args.by_lab)
+    else:
+        model = CSVModel(filename=args.output)
+    try:
+        return _run(args, model)
+    finally:
+        # gli indici e i riepiloghi vengono scritti su disco una sola volta
+        model.flush()
+
+
+def _run(args, model):
+    if args.legacy:
+        normalizer = LegacyNormalizer(model.fields)
+        written = normalizer.normalize(args.inputs, model)
+        print(
+            f'{written} records rewritten, '
+            f'{len(normalizer.header_variants)} header variants'
+        )
+        if normalizer.unknown_columns:
+            print('ignored columns: ' + ', '.join(sorted(normalizer.unknown_columns)))
+        return 0
+
+    report = ingest(
+        args.inputs, model,
+        rejects_file=args.rejects, batch_size=args.batch_size,
+        workers=args.workers
+    )
+    print(report.summary())
+    return 1 if report.rejected or report.file_errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Benchmark: latenza per tasto di `BoundText` al crescere delle note.
+
+Simula la digitazione di alcuni caratteri alla fine di un testo lungo e
+misura il tempo medio per tasto, confrontando la sincronizzazione
+differita di `BoundText` con la vecchia sincronizzazione "a ogni tasto".
+
+Utilizzo (richiede un display)::
+
+    python3 benchmarks/bench_boundtext.py
+"""
+import sys
+import time
+import tkinter as tk
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from abq_data_entry.widgets import BoundText  # noqa: E402
+
+
+class EagerBoundText(tk.Text):
+    """La vecchia implementazione: copia tutto il testo a ogni modifica."""
+
+    def __init__(self, *args, textvariable=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._variable = textvariable
+        self.insert('1.0', self._variable.get())
+        self._variable.trace_add('write', self._set_content)
+        self.bind('<<Modified>>', self._set_var)
+
+    def _set_var(self, *_):
+        if self.edit_modified():
+            self._variable.set(self.get('1.0', 'end-1chars'))
+            self.edit_modified(False)
+
+    def _set_content(self, *_):
+        self.delete('1.0', tk.END)
+        self.insert('1.0', self._variable.get())
+
+
+def keystroke_latency(root, widget_class, size, keystrokes=50):
+    var = tk.StringVar(root, value='x' * (size - 1) + '\n')
+    text = widget_class(root, textvariable=var)
+    text.pack()
+    root.update()
+    start = time.perf_counter()
+    for _ in range(keystrokes):
+        text.insert(tk.END, 'a')
+        root.update()
+    elapsed = time.perf_counter() - start
+    # una lettura finale forza la sincronizzazione
+    assert var.get().endswith('a' * keystrokes)
+    text.destroy()
+    return elapsed / keystrokes * 1000
+
+
+def main():
+    root = tk.Tk()
+    print(f"{'size':>10} {'eager ms/key':>14} {'bound ms/key':>14}")
+    for size in (1_000, 10_000, 100_000, 1_000_000):
+        eager = keystroke_latency(root, EagerBoundText, size)
+        bound = keystroke_latency(root, BoundText, size)
+        print(f"{size:>10} {eager:>14.3f} {bound:>14.3f}")
+    root.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: sketch di quantili e valori distinti contro il calcolo esatto.
+
+Genera valori sintetici simili a quelli dell'archivio (altezze e codici di
+Seed Sample), poi confronta tempo, memoria occupata ed errore di
+`KLLSketch` e `HyperLogLog` con il calcolo esatto (lista ordinata e set).
+
+Utilizzo::
+
+    python3 benchmarks/bench_sketches.py [numero di valori...]
+"""
+import bisect
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from abq_data_entry.sketches import HyperLogLog, KLLSketch  # noqa: E402
+
+QUANTILES = [i / 100 for i in range(1, 100)]
+
+
+def bench_quantiles(n, rng):
+    values = [round(rng.gauss(120, 30), 2) for _ in range(n)]
+
+    start = time.perf_counter()
+    exact = sorted(values)
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # due "partizioni" unite alla fine, come nell'uso reale
+    left, right = KLLSketch(seed=1), KLLSketch(seed=2)
+    half = n // 2
+    for value in values[:half]:
+        left.add(value)
+    for value in values[half:]:
+        right.add(value)
+    sketch = left.merge(right)
+    sketch_time = time.perf_counter() - start
+
+    worst = max(
+        abs(bisect.bisect_right(exact, sketch.quantile(q)) / n - q)
+        for q in QUANTILES
+    )
+    print(
+        f'quantiles n={n:>9}: exact {exact_time:6.3f}s {n:>9} values | '
+        f'KLL {sketch_time:6.3f}s {sketch._size():>5} values | '
+        f'worst rank error {worst:.4%}'
+    )
+
+
+def bench_distinct(n, rng):
+    values = [f'AX{rng.randrange(n // 2 or 1):07d}' for _ in range(n)]
+
+    start = time.perf_counter()
+    exact = len(set(values))
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    left, right = HyperLogLog(), HyperLogLog()
+    half = n // 2
+    for value in values[:half]:
+        left.add(value)
+    for value in values[half:]:
+        right.add(value)
+    estimate = left.merge(right).count()
+    sketch_time = time.perf_counter() - start
+
+    print(
+        f'distinct  n={n:>9}: exact {exact_time:6.3f}s {exact:>9} values | '
+        f'HLL {sketch_time:6.3f}s {left.m:>5} bytes  | '
+        f'relative error {abs(estimate - exact) / exact:.4%}'
+    )
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    rng = random.Random(42)
+    for n in sizes:
+        bench_quantiles(n, rng)
+        bench_distinct(n, rng)
+
+
+if __name__ == '__main__':
+    main()